@@ -0,0 +1,235 @@
+"""Benchmarks pysyge lookups.
+
+Measures start up time, memory (RSS) and throughput with p50/p99 latency
+of `get_location` and `get_locations` for database modes, `detailed` flag
+states and batch sizes, along with database file reads and peak allocations
+per `get_location` (see budgets in tests/test_budgets.py). Every mode is benchmarked in a separate process.
+IPs are drawn from the database's own ranges, reproducibly with a seed.
+
+    $ python benchmarks/bench.py --db tests/SxGeoCity.dat
+    $ python benchmarks/bench.py --db tests/SxGeoCity.dat --modes memory,memory+batch --json > results.json
+
+"""
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from random import Random
+from socket import inet_ntoa
+from time import perf_counter
+from typing import Dict, List, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pysyge.pysyge import (  # noqa
+    GeoLocator, MODE_FILE, MODE_MEMORY, MODE_BATCH, MODE_MMAP, MODE_INDEX, MODE_PAGED, MODE_SHARED,
+)
+
+MODES = {
+    'file': MODE_FILE,
+    'memory': MODE_MEMORY,
+    'batch': MODE_BATCH,
+    'mmap': MODE_MMAP,
+    'index': MODE_INDEX,
+    'paged': MODE_PAGED,
+    'shared': MODE_SHARED,
+}
+
+MODES_DEFAULT = 'file,memory,batch,memory+batch,mmap,paged,index,memory+index'
+
+
+def parse_mode(name: str) -> int:
+    """Returns mode from a name like `memory+batch`."""
+    mode = 0
+
+    for part in name.split('+'):
+        mode |= MODES[part]
+
+    return mode
+
+
+def get_rss() -> int:
+    """Returns current resident set size in bytes (peak size where current is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+    except (OSError, ValueError):  # pragma: nocover
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def sample_ips(db_file: str, count: int, seed: int) -> List[str]:
+    """Returns IPs drawn uniformly from database ranges,
+    an IP at random within every range drawn.
+
+    """
+    locator = GeoLocator(db_file, MODE_INDEX)
+    starts = locator._idx_starts
+    last = locator._idx_b[-1] - 1  # Ranges beyond are padding.
+    random = Random(seed)
+    ips = []
+
+    for _ in range(count):
+        idx = random.randint(0, last - 1)
+        start, end = starts[idx], starts[idx + 1]
+        ips.append(inet_ntoa(random.randrange(start, max(end, start + 1)).to_bytes(4, 'big')))
+
+    return ips
+
+
+def percentiles(timings: List[float]) -> Dict[str, float]:
+    timings = sorted(timings)
+    last = len(timings) - 1
+
+    return {
+        'p50_us': timings[last // 2] * 1e6,
+        'p99_us': timings[last * 99 // 100] * 1e6,
+    }
+
+
+def measure_costs(locator: GeoLocator, ips: List[str], detailed: bool) -> Dict[str, Any]:
+    """Returns average database file reads and most bytes allocated at once per `get_location`."""
+    reads = 0
+    read = locator._read
+
+    def read_counted(offset: int, size: int) -> bytes:
+        nonlocal reads
+        reads += 1
+        return read(offset, size)
+
+    locator._read = read_counted
+    alloc_peak = 0
+    tracemalloc.start()
+
+    try:
+        for ip in ips:
+            tracemalloc.clear_traces()
+            locator.get_location(ip, detailed)
+            alloc_peak = max(alloc_peak, tracemalloc.get_traced_memory()[1])
+
+    finally:
+        tracemalloc.stop()
+        del locator._read
+
+    return {'reads_per_ip': reads / len(ips), 'alloc_peak_b': alloc_peak}
+
+
+def run_mode(db_file: str, mode_name: str, ips: List[str], batch_sizes: List[int]) -> Dict[str, Any]:
+    """Benchmarks a mode. Run in a separate process, so that start up
+    and memory are measured for this mode alone.
+
+    """
+    rss_before = get_rss()
+    started = perf_counter()
+    locator = GeoLocator(db_file, parse_mode(mode_name))
+    startup = perf_counter() - started
+
+    result = {
+        'mode': mode_name,
+        'startup_ms': startup * 1000,
+        'rss_mb': (get_rss() - rss_before) / 2 ** 20,
+        'runs': [],
+    }
+    runs = result['runs']
+
+    for detailed in (False, True):
+
+        get_location = locator.get_location
+        timings = []
+        started = perf_counter()
+
+        for ip in ips:
+            call_started = perf_counter()
+            get_location(ip, detailed)
+            timings.append(perf_counter() - call_started)
+
+        runs.append(dict(
+            method='get_location',
+            detailed=detailed,
+            batch=1,
+            ips_per_s=len(ips) / (perf_counter() - started),
+            **percentiles(timings),
+            **measure_costs(locator, ips[:1000], detailed)
+        ))
+
+        for batch_size in batch_sizes:
+
+            batches = [ips[idx:idx + batch_size] for idx in range(0, len(ips), batch_size)]
+            timings = []
+            started = perf_counter()
+
+            for batch in batches:
+                call_started = perf_counter()
+                locator.get_locations(batch, detailed)
+                timings.append(perf_counter() - call_started)
+
+            runs.append(dict(
+                method='get_locations',
+                detailed=detailed,
+                batch=batch_size,
+                ips_per_s=len(ips) / (perf_counter() - started),
+                **percentiles(timings)
+            ))
+
+    return result
+
+
+def format_results(results: List[Dict[str, Any]]) -> str:
+
+    lines = []
+
+    for result in results:
+        lines.append('%(mode)s: startup %(startup_ms).1f ms, rss %(rss_mb).1f MB' % result)
+
+        for run in result['runs']:
+            lines.append(
+                '  %(method)-13s detailed=%(detailed)-5s batch=%(batch)-6d '
+                '%(ips_per_s)10.0f ips/s  p50 %(p50_us)9.1f us  p99 %(p99_us)9.1f us' % run
+                + ('  reads %(reads_per_ip)4.2f  alloc %(alloc_peak_b)6d B' % run if 'reads_per_ip' in run else ''))
+
+    return '\n'.join(lines)
+
+
+def main(args: List[str] = None):
+
+    parser = argparse.ArgumentParser(prog='bench', description='Benchmarks pysyge lookups.')
+    parser.add_argument('--db', required=True, help='Sypex Geo database file.')
+    parser.add_argument(
+        '--modes', default=MODES_DEFAULT,
+        help='Comma separated modes, combined with `+`, e.g. `memory+batch`. Default: %s.' % MODES_DEFAULT)
+    parser.add_argument('--ips', type=int, default=100000, help='Number of IPs to look up. Default: 100000.')
+    parser.add_argument(
+        '--batch-sizes', default='100,10000',
+        help='Comma separated batch sizes for get_locations. Default: 100,10000.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for IPs sampling. Default: 0.')
+    parser.add_argument('--json', action='store_true', help='Output results as JSON.')
+
+    parsed = parser.parse_args(args)
+
+    modes = parsed.modes.split(',')
+
+    for mode_name in modes:
+        try:
+            parse_mode(mode_name)
+
+        except KeyError:
+            parser.error('Unknown mode: %s' % mode_name)
+
+    batch_sizes = [int(size) for size in parsed.batch_sizes.split(',') if size]
+    ips = sample_ips(parsed.db, parsed.ips, parsed.seed)
+    results = []
+
+    for mode_name in modes:
+        with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as executor:
+            results.append(executor.submit(run_mode, parsed.db, mode_name, ips, batch_sizes).result())
+
+    print(json.dumps(results, indent=2) if parsed.json else format_results(results))
+
+
+if __name__ == '__main__':
+    main()
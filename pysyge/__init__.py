@@ -1,4 +1,8 @@
-from .pysyge import GeoLocator, GeoLocatorException
+from .metrics import LookupMetrics
+from .pysyge import (
+    GeoLocator, GeoLocatorException, Location,
+    MODE_FILE, MODE_MEMORY, MODE_BATCH, MODE_MMAP, MODE_INDEX, MODE_PAGED, MODE_SHARED,
+)
 
 
 VERSION = (1, 2, 1)
\ No newline at end of file
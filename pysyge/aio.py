@@ -0,0 +1,122 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Callable, List, Optional, Union
+from weakref import WeakKeyDictionary
+
+from .pysyge import GeoLocator, TypeGeoDict, MODE_FILE
+
+
+class AsyncGeoLocator:
+    """Asyncio facade for GeoLocator.
+
+    Lookups reading database file (MODE_FILE) are offloaded to an executor,
+    so that they do not block event loop. At most `max_concurrency` of them
+    are run at a time. Lookups in memory (MODE_MEMORY, MODE_MMAP) are cheap
+    and are run right in the loop, unless batches.
+
+    .. code-block:: python
+
+        geodata = AsyncGeoLocator('SxGeoCityMax.dat')
+        location = await geodata.get_location('77.88.21.3')
+
+    """
+    def __init__(
+        self,
+        db_file: str,
+        mode: int = MODE_FILE,
+        max_concurrency: int = 4,
+        chunk_size: int = 1000,
+        executor: Optional[Executor] = None,
+        **kwargs
+    ):
+        """
+        :param db_file: A path to Sypex Geo IP database file.
+
+        :param mode: GeoLocator mode.
+
+        :param max_concurrency: Maximum number of lookups run in executor at a time (per event loop).
+
+        :param chunk_size: Number of IPs from a batch looked up in one executor call.
+
+        :param executor: Executor to run lookups in. If not set, a thread pool
+            of `max_concurrency` threads is created (and shut down on `.close()`).
+
+        :param kwargs: Other GeoLocator arguments.
+
+        :raises: IOError, GeoLocatorException
+
+        """
+        self._locator = locator = GeoLocator(db_file, mode, **kwargs)
+        self._in_memory = bool(locator._memory_mode or locator._mmap_mode)
+        self._max_concurrency = max_concurrency
+        self._semaphores = WeakKeyDictionary()
+        self.chunk_size = chunk_size
+
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_concurrency, thread_name_prefix='pysyge')
+
+    def close(self):
+        """Shuts down executor if it was created by this object."""
+        if self._own_executor:
+            self._executor.shutdown(wait=False)
+
+    async def _run(self, func: Callable, *args):
+
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+
+        if semaphore is None:
+            # One per loop, since a semaphore is bound to the loop it is first used in.
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self._max_concurrency)
+
+        async with semaphore:
+            return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    def get_db_version(self) -> int:
+        """Returns database version number."""
+        return self._locator.get_db_version()
+
+    def get_db_date(self) -> datetime:
+        """Returns database creation datetime."""
+        return self._locator.get_db_date()
+
+    async def get_location(self, ip: str, detailed: bool = False) -> TypeGeoDict:
+        """Returns a dictionary with location data. See GeoLocator.get_location().
+
+        :param ip:
+
+        :param detailed: Amount of information about IP contained
+            in the dictionary depends upon `detailed` flag state.
+
+        """
+        if self._in_memory:
+            return self._locator.get_location(ip, detailed)
+
+        return await self._run(self._locator.get_location, ip, detailed)
+
+    async def get_locations(self, ip: Union[List[str], str], detailed: bool = False) -> List[TypeGeoDict]:
+        """Returns a list of dictionaries with location data. See GeoLocator.get_locations().
+
+        IPs are split into chunks looked up in executor concurrently.
+
+        :param ip:
+
+        :param detailed: Amount of information about IP contained
+            in the dictionary depends upon `detailed` flag state.
+
+        """
+        if isinstance(ip, str):
+            ip = [ip]
+
+        ips = list(ip)
+        chunk_size = self.chunk_size
+        get_locations = self._locator.get_locations
+
+        chunks = await asyncio.gather(*[
+            self._run(get_locations, ips[idx:idx + chunk_size], detailed)
+            for idx in range(0, len(ips), chunk_size)
+        ])
+
+        return [location for chunk in chunks for location in chunk]
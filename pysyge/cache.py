@@ -0,0 +1,89 @@
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional
+
+
+class CacheInfo(NamedTuple):
+    """Cache statistics."""
+
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: Optional[int]
+    currsize: int
+
+
+class LRUCache:
+    """Bounded mapping evicting least recently used entries.
+
+    Safe to be shared between threads: concurrent access may only
+    make statistics slightly inaccurate.
+
+    """
+    def __init__(self, maxsize: Optional[int] = None):
+        """
+        :param maxsize: Maximum number of entries. None - unbounded.
+
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any:
+        """Returns cached value or None if not cached.
+
+        :param key:
+
+        """
+        data = self._data
+
+        try:
+            value = data[key]
+
+        except KeyError:
+            self.misses += 1
+            return None
+
+        if self.maxsize is not None:
+            try:
+                data.move_to_end(key)
+
+            except KeyError:  # Evicted by another thread.
+                pass
+
+        self.hits += 1
+
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        """Puts value into cache evicting the oldest entry if necessary.
+
+        :param key:
+        :param value:
+
+        """
+        data = self._data
+        data[key] = value
+
+        maxsize = self.maxsize
+
+        if maxsize is not None and len(data) > maxsize:
+            try:
+                data.popitem(last=False)
+                self.evictions += 1
+
+            except KeyError:
+                pass
+
+    def clear(self):
+        """Drops all entries and resets statistics."""
+        self._data.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def info(self) -> CacheInfo:
+        """Returns cache statistics."""
+        return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._data))
@@ -0,0 +1,272 @@
+import argparse
+import csv
+import json
+import sys
+from collections import deque
+from itertools import islice
+from functools import partial
+from typing import Iterable, Iterator, List, Optional, Tuple, Any, TextIO
+
+from .parallel import LocatorPool
+from .pysyge import (
+    GeoLocator, TypeGeoDict, MODE_FILE, MODE_MEMORY, MODE_BATCH, MODE_MMAP, MODE_INDEX, MODE_PAGED, MODE_SHARED,
+)
+
+MODES = {
+    'file': MODE_FILE,
+    'memory': MODE_MEMORY,
+    'batch': MODE_BATCH,
+    'mmap': MODE_MMAP,
+    'index': MODE_INDEX,
+    'paged': MODE_PAGED,
+    'shared': MODE_SHARED,
+}
+
+FORMATS = ('plain', 'csv', 'jsonl')
+
+COLUMNS_DEFAULT = 'country_iso,city,lat,lon'
+
+TypeRecord = Tuple[Any, str]
+
+
+def get_value(location: TypeGeoDict, column: str) -> Any:
+    """Returns location value by column name.
+    Dotted names are used to access nested values, e.g. `info.city.name_en`.
+
+    :param location:
+    :param column:
+
+    """
+    value = location
+
+    for key in column.split('.'):
+
+        if not isinstance(value, dict):
+            return None
+
+        value = value.get(key)
+
+    return value
+
+
+def read_records(files: Iterable[TextIO], fmt: str, ip_field: str) -> Iterator[TypeRecord]:
+    """Yields (record, ip) tuples from input files.
+
+    :param files:
+    :param fmt: Input format: plain, csv, jsonl.
+    :param ip_field: Name of the field holding IP for csv and jsonl.
+
+    """
+    for file in files:
+
+        if fmt == 'csv':
+            for row in csv.DictReader(file):
+                yield row, row.get(ip_field) or ''
+            continue
+
+        for line in file:
+            line = line.strip()
+
+            if not line:
+                continue
+
+            if fmt == 'jsonl':
+                record = json.loads(line)
+                yield record, str(record.get(ip_field) or '')
+
+            else:
+                yield None, line
+
+
+def resolve(
+    locator: GeoLocator,
+    ips: List[str],
+    columns: List[str],
+    detailed: bool = False
+) -> List[tuple]:
+    """Returns a list of tuples with column values for every IP.
+    IPs are looked up as a batch (every distinct IP once).
+
+    :param locator:
+    :param ips:
+    :param columns:
+    :param detailed:
+
+    """
+    def get_location(ip: str) -> TypeGeoDict:
+        try:
+            return locator.get_location(ip, detailed=detailed)
+
+        except ValueError:  # Not an IP at all.
+            return {}
+
+    try:
+        locations = locator.get_locations(ips, detailed=detailed)
+
+    except ValueError:
+        # Some are not IPs at all: look up one by one to skip those.
+        locations = [get_location(ip) for ip in ips]
+
+    return [tuple(get_value(location, column) for column in columns) for location in locations]
+
+
+class Writer:
+    """Writes enriched records in a given format.
+
+    CSV header is made of the first record fields: fields missing
+    in later records are left empty, extra ones are dropped.
+
+    """
+
+    def __init__(self, out: TextIO, fmt: str, columns: List[str]):
+        self.out = out
+        self.fmt = fmt
+        self.columns = columns
+        self._csv = None
+
+    def write(self, record: Any, ip: str, values: tuple):
+
+        data = dict(zip(self.columns, values))
+
+        if isinstance(record, dict):
+            data = {**record, **data}
+
+        else:
+            data = {'ip': ip, **data}
+
+        if self.fmt == 'jsonl':
+            self.out.write(json.dumps(data, ensure_ascii=False))
+            self.out.write('\n')
+            return
+
+        if self._csv is None:
+            # Header is made of input fields (or `ip`) followed by columns.
+            self._csv = csv.DictWriter(self.out, fieldnames=list(data.keys()), extrasaction='ignore')
+            self._csv.writeheader()
+
+        self._csv.writerow(data)
+
+
+def enrich(
+    records: Iterable[TypeRecord],
+    writer: Writer,
+    db_file: str,
+    mode: int = MODE_FILE,
+    detailed: bool = False,
+    chunk_size: int = 10000,
+    processes: int = 1,
+    index_file: Optional[str] = None
+):
+    """Enriches records with location data chunk by chunk writing results out.
+    At most a few chunks are held in memory at a time.
+
+    :param records: Iterable of (record, ip) tuples.
+    :param writer:
+    :param db_file:
+    :param mode:
+    :param detailed:
+    :param chunk_size:
+    :param processes: Number of worker processes to spread chunks across.
+    :param index_file: GeoLocator index file.
+
+    """
+    records = iter(records)
+    columns = writer.columns
+
+    def get_chunks():
+        while True:
+            chunk = list(islice(records, chunk_size))
+
+            if not chunk:
+                break
+
+            yield chunk
+
+    def flush(chunk, values):
+        for (record, ip), row in zip(chunk, values):
+            writer.write(record, ip, row)
+
+    if processes <= 1:
+        locator = GeoLocator(db_file, mode, index_file=index_file)
+
+        try:
+            for chunk in get_chunks():
+                flush(chunk, resolve(locator, [ip for _, ip in chunk], columns, detailed))
+
+        finally:
+            locator.close()
+
+        return
+
+    buffer = deque()
+
+    def get_ips():
+        for record, ip in records:
+            buffer.append((record, ip))
+            yield ip
+
+    if index_file:
+        # Write index file once, so that workers only map it.
+        GeoLocator(db_file, MODE_INDEX, index_file=index_file).close()
+
+    with LocatorPool(db_file, mode, processes=processes, chunk_size=chunk_size, index_file=index_file) as pool:
+        resolve_chunk = partial(resolve, columns=columns, detailed=detailed)
+
+        for values in pool.map_chunks(resolve_chunk, get_ips()):
+            flush([buffer.popleft() for _ in values], values)
+
+
+def get_mode(value: str) -> int:
+    mode = MODE_FILE
+
+    for alias in value.split(','):
+        try:
+            mode |= MODES[alias.strip()]
+
+        except KeyError:
+            raise argparse.ArgumentTypeError('unknown mode: %s' % alias)
+
+    return mode
+
+
+def main(args: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='pysyge', description='Enriches IP addresses with location data from Sypex Geo database.')
+
+    parser.add_argument('files', nargs='*', type=argparse.FileType('r', encoding='utf-8'),
+                        help='Input files. Standard input is used if not set.')
+    parser.add_argument('--db', required=True, help='Sypex Geo database file.')
+    parser.add_argument('--mode', type=get_mode, default=MODE_MEMORY,
+                        help='Comma-separated: %s. Default: memory.' % ', '.join(MODES))
+    parser.add_argument('--format', choices=FORMATS, default='plain', help='Input format. Default: plain.')
+    parser.add_argument('--output-format', choices=('jsonl', 'csv'), default='jsonl',
+                        help='Output format. Default: jsonl.')
+    parser.add_argument('--ip-field', default='ip', help='IP field name for csv and jsonl input. Default: ip.')
+    parser.add_argument('--columns', default=COLUMNS_DEFAULT,
+                        help='Comma-separated location columns to output. '
+                             'Dotted names for nested values, e.g. info.city.name_en. Default: %s.' % COLUMNS_DEFAULT)
+    parser.add_argument('--detailed', action='store_true', help='Look up region and country details.')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='IPs per chunk. Default: 10000.')
+    parser.add_argument('--processes', type=int, default=1, help='Number of worker processes. Default: 1.')
+    parser.add_argument('--index-file',
+                        help='File to keep decoded ranges table in between runs (used with index mode).')
+
+    parsed = parser.parse_args(args)
+
+    writer = Writer(sys.stdout, parsed.output_format, [column for column in parsed.columns.split(',') if column])
+
+    try:
+        enrich(
+            read_records(parsed.files or [sys.stdin], parsed.format, parsed.ip_field),
+            writer,
+            db_file=parsed.db,
+            mode=parsed.mode,
+            detailed=parsed.detailed,
+            chunk_size=parsed.chunk_size,
+            processes=parsed.processes,
+            index_file=parsed.index_file,
+        )
+
+    finally:
+        for file in parsed.files:
+            file.close()
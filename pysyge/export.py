@@ -0,0 +1,222 @@
+import csv
+from bisect import bisect_left, bisect_right
+from functools import partial
+from typing import Iterator, Tuple, Dict, Any, Iterable
+
+from .pysyge import GeoLocator, GeoLocatorException, Location
+
+try:
+    import pyarrow
+
+except ImportError:  # pragma: nocover
+    pyarrow = None
+
+TypeRange = Tuple[int, int, int]
+
+FORMATS = ('csv', 'parquet', 'arrow')
+
+COLUMNS = ('start_ip', 'end_ip', 'country_id', 'country_iso', 'region_id', 'city_id', 'lat', 'lon', 'city')
+
+_OCTETS_SKIPPED = {10, 127}  # Never looked up, see `GeoLocator._get_pos()`.
+
+
+def iter_ranges(locator: GeoLocator) -> Iterator[TypeRange]:
+    """Yields (start_ip, end_ip, seek) tuples for IP ranges as they are looked up
+    by the locator (in its mode): IPs are integers, `end_ip` is inclusive, `seek` is a data offset.
+
+    Lookup result only changes at range starts (and right after them)
+    and at ranges table index entries, so that the result is taken from
+    a lookup at every such IP, quirks of the search included.
+
+    Adjacent ranges sharing data offset are merged. Ranges not found
+    (e.g. private networks) are not yielded.
+
+    Ranges table is decoded on first call unless MODE_INDEX is used.
+
+    :param locator:
+
+    """
+    locator._ensure_index()
+
+    b_idx = locator._idx_b
+    starts = locator._idx_starts
+    range_ = locator._range
+    # Not through instance attributes, not to be counted by LookupMetrics as lookups.
+    cls = type(locator)
+
+    if locator._index_mode:
+        search = partial(cls._search_index, locator)
+
+    else:
+        # IPs are searched in ascending order, so that a ranges block is read once (MODE_FILE).
+        last_block = [None, b'']
+
+        def search(ipn: int, ip1oct: int) -> int:
+            return cls._search_pos(locator, ipn.to_bytes(4, 'big'), ip1oct, last_block)
+
+    # Search narrows to another part of ranges table right after an index entry.
+    parts_starts = sorted(ip + 1 for ip in locator._idx_m)
+
+    def get_ranges():
+
+        for ip1oct in range(1, locator._b_idx_len):
+
+            if ip1oct in _OCTETS_SKIPPED:
+                continue
+
+            min_, max_ = b_idx[ip1oct - 1], b_idx[ip1oct]
+            octet_start = ip1oct << 24
+            octet_end = octet_start + 0xFFFFFF
+            points = {octet_start}
+
+            if max_ - min_ > 1:
+                for idx in range(min_, max_):
+                    start = starts[idx]
+                    points.add(start)
+                    points.add(start + 1)
+
+            if max_ - min_ > range_:
+                points.update(parts_starts[
+                    bisect_left(parts_starts, octet_start):bisect_right(parts_starts, octet_end)])
+
+            points = sorted(point for point in points if octet_start <= point <= octet_end)
+            points.append(octet_end + 1)
+
+            for start, next_start in zip(points, points[1:]):
+                yield start, next_start - 1, search(start, ip1oct)
+
+    pending = None
+
+    for start, end, seek in get_ranges():
+
+        if pending is not None:
+
+            if pending[2] == seek and pending[1] + 1 == start:
+                pending = (pending[0], end, seek)
+                continue
+
+            if pending[2]:
+                yield pending
+
+        pending = (start, end, seek)
+
+    if pending is not None and pending[2]:
+        yield pending
+
+
+def iter_rows(locator: GeoLocator) -> Iterator[Tuple[Any, ...]]:
+    """Yields rows with location data for IP ranges. See `COLUMNS` and `iter_ranges()`.
+
+    Every location is decoded once however many ranges share it.
+
+    :param locator:
+
+    :raises: GeoLocatorException
+
+    """
+    if not locator._pack:
+        raise GeoLocatorException('Database has no location records')
+
+    values: Dict[int, tuple] = {}
+
+    for start, end, seek in iter_ranges(locator):
+        row = values.get(seek)
+
+        if row is None:
+            location = Location(locator, seek)
+            row = values[seek] = (
+                location.country_id,
+                location.country_iso,
+                location.region_id,
+                location.city_record['id'],
+                location.lat,
+                location.lon,
+                location.city,
+            )
+
+        yield (start, end) + row
+
+
+def _get_chunks(rows: Iterable[tuple], chunk_size: int) -> Iterator[list]:
+    chunk = []
+
+    for row in rows:
+        chunk.append(row)
+
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def export_ranges(locator: GeoLocator, path: str, fmt: str = 'csv', chunk_size: int = 100000) -> int:
+    """Writes IP ranges with location data into a file incrementally,
+    so that at most `chunk_size` rows are held in memory. Returns the number of rows written.
+
+    Columns: start_ip, end_ip, country_id, country_iso, region_id, city_id, lat, lon, city
+
+    Parquet and Arrow (IPC file) formats require PyArrow.
+
+    :param locator:
+
+    :param path: Output file path.
+
+    :param fmt: Output format: csv, parquet, arrow.
+
+    :param chunk_size: Rows per chunk (also row group size for Parquet).
+
+    :raises: GeoLocatorException
+
+    """
+    if fmt not in FORMATS:
+        raise GeoLocatorException('Unsupported export format: %s' % fmt)
+
+    rows = iter_rows(locator)
+    count = 0
+
+    if fmt == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+
+            for chunk in _get_chunks(rows, chunk_size):
+                writer.writerows(chunk)
+                count += len(chunk)
+
+        return count
+
+    if pyarrow is None:
+        raise GeoLocatorException('PyArrow is required for %s export' % fmt)
+
+    pa = pyarrow
+    schema = pa.schema([
+        ('start_ip', pa.uint32()),
+        ('end_ip', pa.uint32()),
+        ('country_id', pa.uint16()),
+        ('country_iso', pa.string()),
+        ('region_id', pa.uint32()),
+        ('city_id', pa.uint32()),
+        ('lat', pa.float64()),
+        ('lon', pa.float64()),
+        ('city', pa.string()),
+    ])
+
+    if fmt == 'parquet':
+        from pyarrow import parquet
+        writer = parquet.ParquetWriter(path, schema)
+
+    else:
+        writer = pa.ipc.new_file(path, schema)
+
+    try:
+        for chunk in _get_chunks(rows, chunk_size):
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(zip(*chunk), schema)], schema=schema))
+            count += len(chunk)
+
+    finally:
+        writer.close()
+
+    return count
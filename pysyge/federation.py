@@ -0,0 +1,245 @@
+from datetime import datetime
+from socket import inet_aton
+from typing import Dict, List, Optional, Sequence, Union
+
+from .pysyge import GeoLocator, GeoLocatorException, TypeGeoDict
+
+MERGE_FIRST = 'first'
+MERGE_FIELDS = 'fields'
+
+
+class FederatedGeoLocator:
+    """Looks up IPs in several Sypex Geo databases at once,
+    e.g. a city database and a (possibly more recent) country database.
+
+    Every IP is parsed once for all databases, and batches look up
+    every distinct IP once, sweeping every database with the IPs
+    still unresolved. Results are merged in databases priority order.
+
+    Databases without location records (e.g. SxGeo.dat country database)
+    give `country_id` and `country_iso`.
+
+    .. code-block:: python
+
+        with FederatedGeoLocator(['SxGeoCityMax.dat', 'SxGeo.dat'], merge='fields') as geodata:
+            location = geodata.get_location('77.88.21.3')
+
+    """
+    def __init__(self, locators: Sequence[Union[GeoLocator, str]], merge: str = MERGE_FIRST, **kwargs):
+        """
+        :param locators: GeoLocator objects or database file paths, in priority order.
+
+        :param merge: How to merge results:
+            first - result of the first database having the IP. Lower priority
+                databases are not searched for IPs found. Default.
+            fields - fields absent (or empty) in higher priority results
+                are taken from lower priority ones.
+
+        :param kwargs: GeoLocator arguments for databases given as paths.
+
+        :raises: IOError, GeoLocatorException
+
+        """
+        if merge not in {MERGE_FIRST, MERGE_FIELDS}:
+            raise GeoLocatorException('Unsupported merge: %s' % merge)
+
+        if not locators:
+            raise GeoLocatorException('No databases to look up in')
+
+        self.merge = merge
+        self.locators: List[GeoLocator] = []
+        self._opened: List[GeoLocator] = []
+
+        try:
+            for locator in locators:
+
+                if not isinstance(locator, GeoLocator):
+                    locator = GeoLocator(locator, **kwargs)
+                    self._opened.append(locator)
+
+                self.locators.append(locator)
+
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Closes databases opened from paths. GeoLocator objects given are left open."""
+        for locator in self._opened:
+            locator.close()
+
+    def get_db_versions(self) -> List[int]:
+        """Returns databases version numbers in priority order."""
+        return [locator.get_db_version() for locator in self.locators]
+
+    def get_db_dates(self) -> List[datetime]:
+        """Returns databases creation datetimes in priority order."""
+        return [locator.get_db_date() for locator in self.locators]
+
+    @staticmethod
+    def _parse_ip(ip: str) -> Optional[int]:
+        try:
+            return int.from_bytes(inet_aton(ip), 'big')
+
+        except OSError:
+            return None
+
+    @staticmethod
+    def _get_from(locator: GeoLocator, ipn: int, detailed: bool) -> TypeGeoDict:
+
+        if locator._pack:
+            return locator.get_location_int(ipn, detailed)
+
+        # Country database: data offset is a country ID.
+        country_id = locator._get_pos_int(ipn)
+
+        if not country_id:
+            return {}
+
+        return {'country_id': country_id, 'country_iso': locator._cc2iso[country_id]}
+
+    @staticmethod
+    def _get_many(locator: GeoLocator, ipns: List[int], detailed: bool) -> List[TypeGeoDict]:
+        """Batch version of `_get_from()`: a single forward sweep over the database."""
+        if locator._pack:
+            return locator.get_locations_int(ipns, detailed)
+
+        cc2iso = locator._cc2iso
+
+        return [
+            {'country_id': country_id, 'country_iso': cc2iso[country_id]} if country_id else {}
+            for country_id in locator._sweep(locator._parse_int, ipns)
+        ]
+
+    @staticmethod
+    def _merge_fields(location: TypeGeoDict, other: TypeGeoDict):
+        """Fills absent or empty fields of a location from another one, including `info` records."""
+        for key, value in other.items():
+            current = location.get(key)
+
+            if key == 'info' and isinstance(current, dict):
+                for record_key, record in value.items():
+                    current_record = current.get(record_key)
+
+                    if not current_record:
+                        current[record_key] = record
+
+                    elif record:
+                        for field, field_value in record.items():
+                            if not current_record.get(field):
+                                current_record[field] = field_value
+
+            elif not current:
+                location[key] = value
+
+    def _resolve(self, ipn: Optional[int], detailed: bool) -> TypeGeoDict:
+
+        if ipn is None:
+            return {}
+
+        get_from = self._get_from
+        merge_fields = self.merge == MERGE_FIELDS
+        result = {}
+
+        for locator in self.locators:
+            location = get_from(locator, ipn, detailed)
+
+            if not location:
+                continue
+
+            if not result:
+                result = location
+
+                if not merge_fields:
+                    break
+
+            else:
+                self._merge_fields(result, location)
+
+        return result
+
+    def get_location(self, ip: str, detailed: bool = False) -> TypeGeoDict:
+        """Returns a dictionary with location data merged from databases.
+
+        :param ip:
+
+        :param detailed: Amount of information about IP contained
+            in the dictionary depends upon `detailed` flag state.
+
+        """
+        return self._resolve(self._parse_ip(ip), detailed)
+
+    def get_locations(self, ip: Union[List[str], str], detailed: bool = False) -> List[TypeGeoDict]:
+        """Returns a list of dictionaries with location data merged from databases.
+        Every distinct IP is parsed once and looked up once per database:
+        with `first` merge, only IPs not found in higher priority ones.
+
+        :param ip: Argument `ip` must be an iterable object.
+
+        :param detailed: Amount of information about IP contained
+            in the dictionary depends upon `detailed` flag state.
+
+        """
+        if isinstance(ip, str):
+            ip = [ip]
+
+        ips = list(ip)
+        resolved: Dict[str, TypeGeoDict] = {}
+        pending = []
+        parse_ip = self._parse_ip
+
+        for item in ips:
+            if item not in resolved:
+                resolved[item] = {}
+                ipn = parse_ip(item)
+
+                if ipn is not None:
+                    pending.append((item, ipn))
+
+        get_many = self._get_many
+        merge_fields = self.merge == MERGE_FIELDS
+
+        for locator in self.locators:
+
+            if not pending:
+                break
+
+            unresolved = []
+
+            for (item, ipn), location in zip(pending, get_many(locator, [ipn for _, ipn in pending], detailed)):
+
+                if not location:
+                    unresolved.append((item, ipn))
+                    continue
+
+                result = resolved[item]
+
+                if result:
+                    self._merge_fields(result, location)
+
+                else:
+                    resolved[item] = location
+
+            if not merge_fields:
+                pending = unresolved
+
+        # Repeated IPs get their own copies.
+        seen = set()
+        result = []
+
+        for item in ips:
+            location = resolved[item]
+
+            if item in seen and location:
+                location = GeoLocator._copy_location(location) if 'info' in location else dict(location)
+
+            seen.add(item)
+            result.append(location)
+
+        return result
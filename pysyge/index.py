@@ -0,0 +1,126 @@
+import os
+from array import array
+from mmap import mmap, ACCESS_READ
+from struct import Struct
+from sys import byteorder
+from typing import Iterator, List, Optional, Sequence
+
+MAGIC = b'SxGi'
+VERSION = 1
+
+# magic, version, byte order, key (database digest), number of arrays
+_HEADER = Struct('<4sBc32sL')
+_ALIGN = 8
+
+
+def _get_offsets(lengths: Sequence[int]) -> List[int]:
+    """Returns offsets of arrays data aligned for zero-copy access."""
+    offset = _HEADER.size + 4 * len(lengths)
+    offsets = []
+
+    for length in lengths:
+        offset += -offset % _ALIGN
+        offsets.append(offset)
+        offset += length * 4
+
+    return offsets
+
+
+def _iter_parts(key: bytes, arrays: Sequence[array]) -> Iterator[bytes]:
+    """Yields index data parts: header, arrays lengths, padding and arrays data."""
+    lengths = [len(item) for item in arrays]
+
+    yield _HEADER.pack(MAGIC, VERSION, byteorder[0].encode(), key, len(arrays))
+    yield array('I', lengths).tobytes()
+
+    position = _HEADER.size + 4 * len(lengths)
+
+    for offset, item in zip(_get_offsets(lengths), arrays):
+        yield b'\0' * (offset - position)
+        yield memoryview(item).cast('B')
+        position = offset + len(item) * 4
+
+
+def pack_index(key: bytes, arrays: Sequence[array]) -> bytes:
+    """Returns integer arrays packed to be read by `unpack_index()`.
+
+    :param key: 32 bytes identifying the database the index is built for.
+
+    :param arrays: Arrays of unsigned 4 byte integers.
+
+    """
+    return b''.join(_iter_parts(key, arrays))
+
+
+def unpack_index(buffer, key: bytes) -> Optional[List[memoryview]]:
+    """Returns arrays from a buffer (e.g. mapped file, shared memory) filled by `pack_index()`
+    as zero-copy views of unsigned 4 byte integers.
+
+    Returns None if the index is built for another database (key mismatch),
+    another platform or format version.
+
+    :param buffer:
+
+    :param key: 32 bytes identifying the database the index is built for.
+
+    """
+    if len(buffer) < _HEADER.size:
+        return None
+
+    magic, version, order, buffer_key, count = _HEADER.unpack_from(buffer)
+
+    if (magic, version, order, buffer_key) != (MAGIC, VERSION, byteorder[0].encode(), key):
+        return None
+
+    lengths = array('I', bytes(buffer[_HEADER.size:_HEADER.size + 4 * count]))
+    offsets = _get_offsets(lengths)
+
+    if len(lengths) != count or (count and offsets[-1] + lengths[-1] * 4 > len(buffer)):
+        return None
+
+    view = memoryview(buffer)
+
+    return [view[offset:offset + length * 4].cast('I') for offset, length in zip(offsets, lengths)]
+
+
+def save_index(path: str, key: bytes, arrays: Sequence[array]):
+    """Writes integer arrays into index file to be mapped by `load_index()`.
+
+    File is written into a temporary file first and then renamed,
+    so that readers never see it partially written.
+
+    :param path: Index file path.
+
+    :param key: 32 bytes identifying the database the index is built for.
+
+    :param arrays: Arrays of unsigned 4 byte integers.
+
+    """
+    tmp_path = '%s.%s.tmp' % (path, os.getpid())
+
+    with open(tmp_path, 'wb') as f:
+        for part in _iter_parts(key, arrays):
+            f.write(part)
+
+    os.replace(tmp_path, path)
+
+
+def load_index(path: str, key: bytes) -> Optional[List[memoryview]]:
+    """Maps index file written by `save_index()` into memory
+    and returns its arrays as zero-copy views of unsigned 4 byte integers.
+
+    Returns None if there is no file, or it does not match. See `unpack_index()`.
+
+    :param path: Index file path.
+
+    :param key: 32 bytes identifying the database the index is built for.
+
+    """
+    try:
+        with open(path, 'rb') as f:
+            mm = mmap(f.fileno(), 0, access=ACCESS_READ)
+
+    except (OSError, ValueError):  # ValueError - empty file.
+        return None
+
+    return unpack_index(mm, key)
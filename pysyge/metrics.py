@@ -0,0 +1,235 @@
+from functools import wraps
+from socket import inet_aton
+from time import perf_counter
+from typing import Callable, Dict, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:  # pragma: nocover
+    from .pysyge import GeoLocator
+
+
+class LookupMetrics:
+    """Collects lookup phases timings, bytes read from database file
+    and lookups counts by outcome.
+
+    Pass an object to GeoLocator (`metrics` argument) to enable. Locator methods
+    are wrapped only then, so that locators without metrics have no overhead.
+    Batches are measured as they are run: every distinct IP of a batch
+    is searched and counted once.
+
+    Phases (nested ones are included into `search` and `record`):
+        search - IP to location data offset.
+        search_idx - search in main index.
+        search_db - search in ranges table block.
+        read - database file reads (MODE_FILE).
+        record - getting a record (city, region, country), including read and decode.
+        decode - decoding record bytes.
+
+    Outcomes:
+        private - IP from networks never looked up (private, loopback, reserved).
+        invalid - not an IP.
+        miss - IP is not in database.
+        country - location is known up to a country.
+        city - location is known up to a city.
+
+    Safe to be shared between threads and locators: concurrent updates
+    may only make numbers slightly inaccurate.
+
+    """
+    PHASES = ('search', 'search_idx', 'search_db', 'read', 'record', 'decode')
+    OUTCOMES = ('private', 'invalid', 'miss', 'country', 'city')
+
+    def __init__(self):
+        self.calls: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+        self.outcomes: Dict[str, int] = {}
+        self.bytes_read = 0
+        self.reset()
+
+    def reset(self):
+        """Resets all numbers to zero."""
+        self.calls = dict.fromkeys(self.PHASES, 0)
+        self.seconds = dict.fromkeys(self.PHASES, 0.0)
+        self.outcomes = dict.fromkeys(self.OUTCOMES, 0)
+        self.bytes_read = 0
+
+    def add_timing(self, phase: str, seconds: float):
+        """Called on every phase finish. Can be overridden, e.g. to feed other metrics systems.
+
+        :param phase:
+        :param seconds:
+
+        """
+        self.calls[phase] += 1
+        self.seconds[phase] += seconds
+
+    def add_outcome(self, outcome: str):
+        """Called on every IP search finish. Can be overridden.
+
+        :param outcome:
+
+        """
+        self.outcomes[outcome] += 1
+
+    def add_read(self, size: int):
+        """Called on every database file read. Can be overridden.
+
+        :param size: Bytes read.
+
+        """
+        self.bytes_read += size
+
+    def info(self) -> Dict[str, Any]:
+        """Returns a dictionary with collected numbers:
+        phases (calls, seconds, average microseconds), outcomes, bytes read.
+
+        """
+        calls = self.calls
+        seconds = self.seconds
+
+        return {
+            'phases': {
+                phase: {
+                    'calls': calls[phase],
+                    'seconds': seconds[phase],
+                    'avg_us': seconds[phase] / calls[phase] * 1e6 if calls[phase] else 0.0,
+                }
+                for phase in self.PHASES
+            },
+            'outcomes': dict(self.outcomes),
+            'bytes_read': self.bytes_read,
+        }
+
+    def _timed(self, func: Callable, phase: str) -> Callable:
+
+        add_timing = self.add_timing
+
+        @wraps(func)
+        def timed(*args, **kwargs):
+            started = perf_counter()
+
+            try:
+                return func(*args, **kwargs)
+
+            finally:
+                add_timing(phase, perf_counter() - started)
+
+        return timed
+
+    def _counted_search(self, func: Callable, locator: 'GeoLocator') -> Callable:
+        """Wraps IP search to time it and count its outcome: miss, country or city."""
+        add_timing = self.add_timing
+        add_outcome = self.add_outcome
+        country_size = locator._country_size
+
+        @wraps(func)
+        def search(*args):
+            started = perf_counter()
+
+            try:
+                seek = func(*args)
+
+            finally:
+                add_timing('search', perf_counter() - started)
+
+            if seek > 0:
+                add_outcome('country' if seek < country_size else 'city')
+
+            else:
+                add_outcome('miss')
+
+            return seek
+
+        return search
+
+    def _counted_skip(self, func: Callable, get_outcome: Callable, skipped: Any) -> Callable:
+        """Wraps a function returning `skipped` for IPs not to be searched
+        (or raising ValueError for non-IPs) to count those: private or invalid.
+
+        """
+        add_outcome = self.add_outcome
+
+        @wraps(func)
+        def skip(ip):
+            try:
+                result = func(ip)
+
+            except ValueError:
+                add_outcome('invalid')
+                raise
+
+            if result == skipped:
+                outcome = get_outcome(ip)
+
+                if outcome != 'miss':  # Searched and counted.
+                    add_outcome(outcome)
+
+            return result
+
+        return skip
+
+    def instrument(self, locator: 'GeoLocator'):
+        """Wraps locator methods to collect metrics.
+
+        :param locator:
+
+        """
+        timed = self._timed
+        add_read = self.add_read
+        skipped = {0, 10, 127}
+        b_idx_len = locator._b_idx_len
+
+        def get_outcome_str(ip: str) -> str:
+            ip1oct = int(ip.split('.', 1)[0])
+
+            if ip1oct > 255:
+                return 'invalid'
+
+            if ip1oct in skipped or ip1oct >= b_idx_len:
+                return 'private'
+
+            try:
+                inet_aton(ip)
+
+            except OSError:
+                return 'invalid'
+
+            return 'miss'
+
+        def get_outcome_int(ip: int) -> str:
+            if not 0 <= ip <= 0xFFFFFFFF:
+                return 'invalid'
+
+            return 'private' if ip >> 24 in skipped or ip >> 24 >= b_idx_len else 'miss'
+
+        def get_outcome_packed(ipn: bytes) -> str:
+            return 'private' if ipn[0] in skipped or ipn[0] >= b_idx_len else 'miss'
+
+        counted_skip = self._counted_skip
+        counted_search = self._counted_search
+
+        # Single IPs.
+        locator._get_pos = counted_skip(locator._get_pos, get_outcome_str, 0)
+        locator._get_pos_int = counted_skip(locator._get_pos_int, get_outcome_int, 0)
+        locator._get_pos_packed = counted_skip(locator._get_pos_packed, get_outcome_packed, 0)
+        # Batches.
+        locator._parse_ip = counted_skip(locator._parse_ip, get_outcome_str, None)
+        locator._parse_int = counted_skip(locator._parse_int, get_outcome_int, None)
+        locator._parse_packed = counted_skip(locator._parse_packed, get_outcome_packed, None)
+        # Both.
+        locator._search_pos = counted_search(locator._search_pos, locator)
+        locator._search_index = counted_search(timed(locator._search_index, 'search_idx'), locator)
+        locator._search_idx = timed(locator._search_idx, 'search_idx')
+        locator._search_db = timed(locator._search_db, 'search_db')
+        locator._read_data_chunk = timed(locator._read_data_chunk, 'record')
+
+        read = timed(locator._read, 'read')
+
+        def read_counted(offset: int, size: int) -> bytes:
+            data = read(offset, size)
+            add_read(len(data))
+            return data
+
+        locator._read = read_counted
+
+        for parser in locator._parsers:
+            parser.parse = timed(parser.parse, 'decode')
@@ -0,0 +1,141 @@
+import os
+from collections import deque
+from functools import partial
+from itertools import islice
+from multiprocessing import Pool
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from .pysyge import GeoLocator, TypeGeoDict, MODE_MMAP
+
+_worker_locator: Optional[GeoLocator] = None
+_worker_error: Optional[Exception] = None
+
+
+def _init_worker(db_file: str, kwargs: dict):
+    global _worker_locator, _worker_error
+
+    try:
+        _worker_locator = GeoLocator(db_file, **kwargs)
+
+    except Exception as e:
+        # Raising from initializer makes pool respawn workers forever,
+        # so the error is reported back with the first task instead.
+        _worker_error = e
+
+
+def _run_in_worker(func: Callable, chunk: list) -> Any:
+
+    if _worker_error is not None:
+        raise _worker_error
+
+    return func(_worker_locator, chunk)
+
+
+def _get_locations(locator: GeoLocator, ips: List[str], detailed: bool = False) -> List[TypeGeoDict]:
+    return locator.get_locations(ips, detailed=detailed)
+
+
+class LocatorPool:
+    """Resolves IPs in parallel using a pool of worker processes.
+
+    Every worker opens the database once on start (MODE_MMAP by default, so
+    that workers share a single copy of the data) and serves chunks of IPs
+    for as long as the pool lives. The pool is reusable across calls.
+
+    .. code-block:: python
+
+        with LocatorPool('SxGeoCityMax.dat', processes=4) as pool:
+            locations = pool.get_locations(ips)
+
+    """
+    def __init__(
+        self,
+        db_file: str,
+        mode: int = MODE_MMAP,
+        processes: Optional[int] = None,
+        chunk_size: int = 10000,
+        **kwargs
+    ):
+        """
+        :param db_file: A path to Sypex Geo IP database file.
+
+        :param mode: GeoLocator mode for workers.
+
+        :param processes: Number of worker processes. Defaults to CPU count.
+
+        :param chunk_size: Number of IPs sent to a worker at a time.
+
+        :param kwargs: Other GeoLocator arguments for workers.
+
+        :raises: IOError, GeoLocatorException
+
+        """
+        kwargs['mode'] = mode
+
+        # Fail fast on a bad database file before starting workers.
+        GeoLocator(db_file).close()
+
+        self.chunk_size = chunk_size
+        self._processes = processes or os.cpu_count() or 1
+        self._pool = Pool(self._processes, initializer=_init_worker, initargs=(db_file, kwargs))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Stops worker processes."""
+        self._pool.terminate()
+        self._pool.join()
+
+    def map_chunks(self, func: Callable, items: Iterable) -> Iterator:
+        """Splits items into chunks and yields results of `func(locator, chunk)`
+        run in workers, in order of chunks.
+
+        Items are consumed lazily: only a few chunks per worker are in flight.
+
+        :param func: Module level (picklable) function accepting
+            worker's GeoLocator and a list of items.
+
+        :param items:
+
+        """
+        items = iter(items)
+        chunk_size = self.chunk_size
+        pool = self._pool
+        max_pending = self._processes * 2
+        pending = deque()
+
+        while True:
+            chunk = list(islice(items, chunk_size))
+
+            if chunk:
+                pending.append(pool.apply_async(_run_in_worker, (func, chunk)))
+
+            if pending and (not chunk or len(pending) >= max_pending):
+                yield pending.popleft().get()
+
+            elif not chunk:
+                break
+
+    def get_locations(self, ips: Iterable[str], detailed: bool = False) -> List[TypeGeoDict]:
+        """Returns a list of dictionaries with location data.
+        Same as GeoLocator.get_locations() but done in parallel.
+
+        :param ips:
+
+        :param detailed: Amount of information about IP contained
+            in the dictionary depends upon `detailed` flag state.
+
+        """
+        if isinstance(ips, str):
+            ips = [ips]
+
+        locations = []
+
+        for chunk in self.map_chunks(partial(_get_locations, detailed=detailed), ips):
+            locations.extend(chunk)
+
+        return locations
@@ -1,15 +1,52 @@
+from array import array
 from binascii import hexlify
+from bisect import bisect_left, bisect_right
 from datetime import datetime
+from hashlib import blake2b
+from itertools import islice
 from math import floor
+from mmap import mmap, ACCESS_READ
+from os import fstat
 from socket import inet_aton
-from struct import unpack
-from typing import Union, List, Dict, Any
+from threading import Lock
+from struct import unpack, Struct
+from sys import byteorder
+from typing import Union, List, Dict, Any, Optional, Tuple, Iterable, Iterator, Callable, TYPE_CHECKING
+
+from .cache import LRUCache, CacheInfo
+from .index import load_index, save_index
+from .metrics import LookupMetrics
+
+if TYPE_CHECKING:  # pragma: nocover
+    from .reverse import ReverseIndex
+
+try:
+    from os import pread
+
+except ImportError:  # pragma: nocover
+    pread = None  # Windows.
+
+try:
+    import numpy
+
+except ImportError:  # pragma: nocover
+    numpy = None
+
+try:
+    from multiprocessing import shared_memory
+
+except ImportError:  # pragma: nocover
+    shared_memory = None  # Python < 3.8
 
 TypeGeoDict = Dict[str, Any]
 
 MODE_FILE = 0
 MODE_MEMORY = 1
 MODE_BATCH = 2
+MODE_MMAP = 4
+MODE_INDEX = 8
+MODE_PAGED = 16
+MODE_SHARED = 32
 
 
 def chr_(val: Union[int, bytes]):
@@ -26,7 +63,284 @@ class GeoLocatorException(Exception):
     """Basic pysyge GeoLocator exception."""
 
 
+class PackParser:
+    """Decodes database records described by a pack format string,
+    e.g. `T:id/c2:iso/n2:lat/n2:lon/b:name_ru/b:name_en`.
+
+    Pack is compiled once into a sequence of steps: runs of fixed size fields
+    are unpacked with a single precompiled struct, null-terminated
+    strings (`b`) are located with a search.
+
+    """
+    _codes = {
+        't': 'b', 'T': 'B',
+        's': 'h', 'S': 'H', 'n': 'h',
+        'm': '3s', 'M': '3s',
+        'i': 'i', 'I': 'I', 'N': 'i',
+        'f': 'f', 'd': 'd',
+    }
+
+    def __init__(self, pack: bytes):
+        self.pack = pack
+
+        steps = []
+        codes, names, converters = [], [], []
+        empty = {}
+        fields = {}
+        offset = 0
+
+        def flush():
+            if codes:
+                steps.append((
+                    Struct('=' + ''.join(codes)),
+                    tuple(names),
+                    tuple(converters) if any(converters) else None
+                ))
+                codes.clear()
+                names.clear()
+                converters.clear()
+
+        for chunk in pack.split(b'/') if pack else []:
+
+            chunk_type, chunk_name = chunk.split(b':')
+            chunk_name = chunk_name.decode()
+            type_letter = chr_(chunk_type[0])
+
+            empty[chunk_name] = '' if type_letter in {'b', 'c'} else 0
+
+            if type_letter == 'b':
+                flush()
+                steps.append((None, chunk_name, None))
+                offset = None  # Offsets of the following fields depend on strings lengths.
+                continue
+
+            converter = None
+
+            if type_letter == 'c':
+                code = '%ds' % int(chunk_type[1:].decode())
+                converter = lambda val: val.rstrip(b' ').decode()
+
+            else:
+                code = self._codes.get(type_letter, '4sx')  # Unknown types are read as raw bytes.
+
+                if type_letter == 'M':
+                    converter = lambda val: int.from_bytes(val + b'\0', byteorder)
+
+                elif type_letter == 'm':
+                    converter = lambda val: int.from_bytes(val, byteorder, signed=True)
+
+                elif type_letter in {'n', 'N'}:
+                    divider = pow(10, int(chr_(chunk_type[1])))
+                    converter = lambda val, divider=divider: val / divider
+
+            codes.append(code)
+            names.append(chunk_name)
+            converters.append(converter)
+
+            if offset is not None:
+                struct = Struct('=' + code)
+                fields[chunk_name] = (offset, struct, converter)
+                offset += struct.size
+
+        flush()
+
+        self._steps = steps
+        self._empty = empty
+        self._fields = fields
+
+    def get_field_span(self, name: str) -> Optional[Tuple[int, int]]:
+        """Returns (offset, size) of a field within a record,
+        or None if field offset depends on the record contents.
+
+        :param name:
+
+        """
+        field = self._fields.get(name)
+
+        if field is None:
+            return None
+
+        return field[0], field[1].size
+
+    def parse_field(self, name: str, item: bytes, offset: int = 0) -> Any:
+        """Returns a single field value decoded from the given bytes,
+        not decoding other fields. See `.get_field_span()`.
+
+        :param name:
+
+        :param item: Record bytes.
+
+        :param offset: Position of the field within `item`.
+
+        """
+        _, struct, converter = self._fields[name]
+        val = struct.unpack_from(item, offset)[0]
+
+        return val if converter is None else converter(val)
+
+    def parse(self, item: bytes = b'') -> TypeGeoDict:
+        """Returns a dictionary with record fields decoded from the given bytes.
+        If no bytes given, a dictionary with empty field values is returned.
+
+        :param item:
+
+        """
+        if not item:
+            return dict(self._empty)
+
+        result = {}
+        start_pos = 0
+
+        for struct, names, converters in self._steps:
+
+            if struct is None:  # case `b`
+                end_pos = item.find(b'\0', start_pos)
+                result[names] = item[start_pos:end_pos].decode()
+                start_pos = end_pos + 1
+                continue
+
+            values = struct.unpack_from(item, start_pos)
+            start_pos += struct.size
+
+            if converters is None:
+                result.update(zip(names, values))
+                continue
+
+            for name, val, converter in zip(names, values, converters):
+                result[name] = val if converter is None else converter(val)
+
+        return result
+
+
+class Location:
+    """Lean lookup result. Records are decoded lazily on first access
+    to the attributes needing them, and then kept.
+
+    Returned by `.get_location()` and `.get_locations()` with `lean=True`.
+
+    """
+    __slots__ = ('seek', '_locator', '_city', '_region', '_country')
+
+    def __init__(self, locator: 'GeoLocator', seek: int):
+        self.seek = seek
+        """Data offset of the location in database."""
+
+        self._locator = locator
+        self._city = None
+        self._region = None
+        self._country = None
+
+    def __repr__(self):
+        return '<Location %s %s>' % (self.country_iso, self.seek)
+
+    def __eq__(self, other):
+        return isinstance(other, Location) and other.seek == self.seek and other._locator is self._locator
+
+    def __hash__(self):
+        return hash(self.seek)
+
+    @property
+    def country_only(self) -> bool:
+        """Location is known up to a country."""
+        return self.seek < self._locator._country_size
+
+    @property
+    def city_record(self) -> TypeGeoDict:
+        """City record. Empty (with country coordinates) for country only locations."""
+        city = self._city
+
+        if city is None:
+            locator = self._locator
+
+            if self.country_only:
+                country = self.country_record
+                city = locator._parsers[locator._TYPE_CITY].parse(b'')
+                city['lat'] = country['lat']
+                city['lon'] = country['lon']
+
+            else:
+                city = locator._read_data_chunk(locator._TYPE_CITY, self.seek, locator._max_city)
+
+            self._city = city
+
+        return city
+
+    @property
+    def region_record(self) -> TypeGeoDict:
+        """Region record. Empty for country only locations."""
+        region = self._region
+
+        if region is None:
+            locator = self._locator
+            region_seek = 0 if self.country_only else self.city_record['region_seek']
+            region = self._region = locator._read_data_chunk(locator._TYPE_REGION, region_seek, locator._max_region)
+
+        return region
+
+    @property
+    def country_record(self) -> TypeGeoDict:
+        """Country record."""
+        country = self._country
+
+        if country is None:
+            locator = self._locator
+            country_seek = self.seek if self.country_only else self.region_record['country_seek']
+            country = self._country = locator._read_data_chunk(
+                locator._TYPE_COUNTRY, country_seek, locator._max_country)
+
+        return country
+
+    @property
+    def country_id(self) -> int:
+        city = self._city
+
+        if city is None or self.country_only:
+            # City record is not decoded just for that.
+            return self._locator._get_country_id(self.seek)
+
+        return city['country_id']
+
+    @property
+    def country_iso(self) -> str:
+        return self._locator._cc2iso[self.country_id]
+
+    @property
+    def city(self) -> str:
+        return self.city_record['name_ru']
+
+    @property
+    def lat(self) -> float:
+        return self.city_record['lat']
+
+    @property
+    def lon(self) -> float:
+        return self.city_record['lon']
+
+    @property
+    def region(self) -> str:
+        return self.region_record.get('name_ru', '')
+
+    @property
+    def region_id(self) -> int:
+        return self.region_record.get('id', 0)
+
+    @property
+    def tz(self) -> str:
+        return self.region_record.get('timezone', '')
+
+    def to_dict(self, detailed: bool = False) -> TypeGeoDict:
+        """Returns a dictionary as `GeoLocator.get_location()` does."""
+        return self._locator._parse_location(self.seek, detailed=detailed)
+
+
 class GeoLocator:
+    """Interface to Sypex Geo IP database.
+
+    An object can be shared between threads in every mode: lookups only
+    fill caches (records, locations, pages, countries), which tolerate
+    concurrent access, and file reads do not depend on file position.
+
+    """
 
     _cc2iso = (
         '', 'AP', 'EU', 'AD', 'AE', 'AF', 'AG', 'AI', 'AL', 'AM', 'CW', 'AO', 'AQ', 'AR', 'AS', 'AT', 'AU',
@@ -48,12 +362,36 @@ class GeoLocator:
     )
     _batch_mode = False
     _memory_mode = False
+    _mmap_mode = False
+    _paged_mode = False
+    _pages_cache = None
+    _index_mode = False
+    _idx_starts = None
+    _index_file = None
+    _index_shm = None
+    _shm = None
+    _records_cache = None
+    _locations_cache = None
+    _locations_cache_by_ip = False
+    _reverse_index = None
 
     _TYPE_COUNTRY = 0
     _TYPE_REGION = 1
     _TYPE_CITY = 2
 
-    def __init__(self, db_file: str, mode: int = MODE_FILE):
+    def __init__(
+        self,
+        db_file: str,
+        mode: int = MODE_FILE,
+        records_cache: Optional[int] = 0,
+        index_file: Optional[str] = None,
+        index_shm: Optional[str] = None,
+        locations_cache: Optional[int] = 0,
+        locations_cache_by: str = 'range',
+        metrics: Optional[LookupMetrics] = None,
+        page_size: int = 65536,
+        pages_budget: int = 16777216
+    ):
         """Creates an interface to access Sypex Geo IP database data.
 
         :param db_file: A path to Sypex Geo IP database file.
@@ -62,15 +400,82 @@ class GeoLocator:
             MODE_FILE - Seek data in database file on every IP request. Default.
             MODE_MEMORY - Read entire db into memory, an seek data there.
             MODE_BATCH - Create additional indexes to speed up batch IP requests.
+            MODE_MMAP - Map db file into memory instead of reading it. Pages are shared
+                by all processes using the same file. Takes precedence over MODE_MEMORY.
+            MODE_INDEX - Decode ranges table into compact integer arrays on load
+                to search IPs as integers. Replaces MODE_BATCH.
+            MODE_PAGED - Read ranges table into memory, and read city, region and country records
+                from database file by pages kept in a cache of `pages_budget` bytes.
+                MODE_MEMORY and MODE_MMAP take precedence.
+            MODE_SHARED - MODE_MMAP and MODE_INDEX keeping no per-entry Python objects,
+                so that forked processes do not un-share memory pages by touching them.
+                Index arrays are attached from shared memory if `index_shm` is given. See SharedIndex.
+
+        :param records_cache: Number of decoded city, region and country records to keep
+            in a cache evicting least recently used ones. 0 - disable cache (default), None - unbounded.
+            See also `.load_records()`.
+
+        :param index_file: A path to a file to keep integer arrays decoded from ranges table
+            (MODE_INDEX, bulk lookups) in. The arrays are mapped from the file instead of being decoded
+            if it was built for the same database, otherwise the file is (re)written.
+
+        :param index_shm: A name of shared memory segment holding integer arrays decoded from ranges table
+            (see `pysyge.shared.SharedIndex`). The arrays are used from there instead of being decoded.
+            Requires Python 3.8+.
+
+        :param locations_cache: Number of lookup results (dictionaries) to keep in a cache
+            evicting least recently used ones. 0 - disable cache (default), None - unbounded.
+            The cache belongs to the database it is filled from: a reloaded database
+            (see ReloadableGeoLocator) starts with an empty one.
+
+        :param locations_cache_by: Lookup results cache key:
+            range - location data offset, so that all IPs of a range (and all ranges
+                of a location) share an entry. IP is still searched on every lookup. Default.
+            ip - IP as given, so that neither search nor decoding is done for a cached IP.
+
+        :param metrics: LookupMetrics object to collect lookup phases timings and outcomes into.
+
+        :param page_size: MODE_PAGED page size in bytes.
+
+        :param pages_budget: MODE_PAGED pages cache size in bytes. Least recently used pages are evicted.
 
         :raises: IOError, GeoLocatorException
 
         """
+        if locations_cache_by not in {'range', 'ip'}:
+            raise GeoLocatorException('Unsupported locations cache key: %s' % locations_cache_by)
+
+        for name, value in (('records_cache', records_cache), ('locations_cache', locations_cache)):
+            if value is not None and not isinstance(value, int):
+                raise GeoLocatorException('Unsupported %s size: %r' % (name, value))
+
+        if not isinstance(pages_budget, int):
+            raise GeoLocatorException('Unsupported pages budget: %r' % (pages_budget,))
+
+        if index_shm and shared_memory is None:
+            raise GeoLocatorException('Shared memory index requires Python 3.8+')
+
+        self._init_args = (db_file, {
+            'mode': mode,
+            'records_cache': records_cache,
+            'index_file': index_file,
+            'index_shm': index_shm,
+            'locations_cache': locations_cache,
+            'locations_cache_by': locations_cache_by,
+            'metrics': metrics,
+            'page_size': page_size,
+            'pages_budget': pages_budget,
+        })
         self._fh = open(db_file, 'rb')
+        self._fd = self._fh.fileno()
+        self._lock = Lock()
+        # Separate from `_lock`, since reads happen while it is held (e.g. index building).
+        self._read_lock = Lock()
 
         header = self._fh.read(40)
 
         if header[:3] != b'SxG':
+            self._fh.close()
             raise GeoLocatorException('Unable open file %s' % db_file)
 
         prolog = dict(zip(
@@ -82,6 +487,7 @@ class GeoLocator:
 
         if prolog['b_idx_len'] * prolog['m_idx_len'] * prolog['range'] * prolog['db_items'] * \
                 prolog['ts'] * prolog['id_len'] == 0:
+            self._fh.close()
             raise GeoLocatorException('Wrong file format %s' % db_file)
 
         self._b_idx_len = prolog['b_idx_len']
@@ -94,17 +500,33 @@ class GeoLocator:
         self._max_city = prolog['max_city']
         self._max_country = prolog['max_country']
         self._country_size = prolog['country_size']
-        self._batch_mode = mode & MODE_BATCH
-        self._memory_mode = mode & MODE_MEMORY
+        if mode & MODE_SHARED:
+            mode = MODE_MMAP | MODE_INDEX
+
+        self._index_mode = mode & MODE_INDEX
+        self._batch_mode = mode & MODE_BATCH and not self._index_mode
+        self._mmap_mode = mode & MODE_MMAP
+        self._memory_mode = mode & MODE_MEMORY and not self._mmap_mode
+        self._paged_mode = mode & MODE_PAGED and not self._mmap_mode and not self._memory_mode
         self._db_ver = prolog['ver']
         self._db_ts = prolog['ts']
 
-        self._pack = self._fh.read(prolog['pack_size']).split(b'\0') if prolog['pack_size'] else ''
+        packs = self._fh.read(prolog['pack_size'])
+        self._pack = packs.split(b'\0') if prolog['pack_size'] else ''
+        self._parsers = [PackParser(pack) for pack in self._pack]
 
         self._b_idx_str = self._fh.read(prolog['b_idx_len'] * 4)
         self._m_idx_str = self._fh.read(prolog['m_idx_len'] * 4)
         self._db_begin = self._fh.tell()
 
+        # Header holds database timestamp, indexes hold ranges starts samples.
+        self._index_file = index_file
+        self._index_shm = index_shm
+        self._index_key = blake2b(
+            b''.join((header, packs, self._b_idx_str, self._m_idx_str, b'%d' % fstat(self._fd).st_size)),
+            digest_size=32
+        ).digest()
+
         if self._batch_mode:
             self._b_idx_set = unpack('>%dL' % self._b_idx_len, self._b_idx_str)
             del self._b_idx_str
@@ -124,9 +546,167 @@ class GeoLocator:
 
             self._fh.close()
 
+        elif self._mmap_mode:
+            self._mm = mmap(self._fh.fileno(), 0, access=ACCESS_READ)
+            self._fh.close()
+
+        elif self._paged_mode:
+            self._db = self._fh.read(self._db_items * self._block_len)
+            self._page_size = page_size
+            self._pages_cache = LRUCache(max(pages_budget // page_size, 1))
+
         self._info = {'regions_begin': self._db_begin + self._db_items * self._block_len}
         self._info['cities_begin'] = self._info['regions_begin'] + prolog['region_size']
 
+        if self._index_mode:
+            self._init_index()
+
+            if self._memory_mode or self._paged_mode:
+                del self._db
+
+        if records_cache != 0:
+            self._records_cache = LRUCache(records_cache)
+
+        if locations_cache != 0:
+            self._locations_cache = LRUCache(locations_cache)
+            self._locations_cache_by_ip = locations_cache_by == 'ip'
+
+        if metrics is not None:
+            metrics.instrument(self)
+
+        self._countries = {}
+
+    def close(self):
+        """Closes database file (and shared memory segment index arrays are attached from).
+        Lookups are not possible afterwards.
+
+        """
+        self._fh.close()
+
+        if self._mmap_mode:
+            self._mm.close()
+
+        shm = self._shm
+
+        if shm is not None:
+            self._shm = None
+
+            # Views into the segment are to be released for it to be closed.
+            for view in (self._idx_m, self._idx_seeks, self._idx_starts):
+                view.release()
+
+            shm.close()
+
+    def __reduce__(self):
+        # Open file handles and mappings can't be pickled, so the database
+        # is opened anew on unpickling (e.g. in another process).
+        db_file, kwargs = self._init_args
+        return _restore_locator, (self.__class__, db_file, kwargs)
+
+    def _build_index(self):
+        """Decodes ranges table into integer arrays of range starts and data offsets."""
+        db = self._read_db()
+        items = self._db_items
+        block_len = self._block_len
+        id_len = self._id_len
+
+        if self._batch_mode:
+            b_idx = self._b_idx_set
+            m_idx = b''.join(self._m_idx_set)
+
+        else:
+            b_idx = unpack('>%dL' % self._b_idx_len, self._b_idx_str)
+            m_idx = self._m_idx_str
+
+        # Build big-endian 4 byte words with strided slices to avoid per item loop.
+        starts = bytearray(items * 4)
+        starts[1::4] = db[0::block_len]
+        starts[2::4] = db[1::block_len]
+        starts[3::4] = db[2::block_len]
+
+        for ip1oct in range(1, self._b_idx_len):
+            min_, max_ = b_idx[ip1oct - 1], b_idx[ip1oct]
+            starts[min_ * 4:max_ * 4:4] = bytes((ip1oct,)) * (max_ - min_)
+
+        # Keep the whole array sorted (as vectorized search requires),
+        # including ranges beyond the last indexed octet.
+        tail = b_idx[-1]
+        starts[tail * 4:] = b'\xff' * ((items - tail) * 4)
+
+        seeks = bytearray(items * 4)
+
+        for idx in range(id_len):
+            seeks[4 - id_len + idx::4] = db[3 + idx::block_len]
+
+        self._idx_b = b_idx
+        self._idx_m = self._unpack_index(m_idx)
+        self._idx_seeks = self._unpack_index(seeks)
+        self._idx_starts = self._unpack_index(starts)
+
+    def _ensure_index(self):
+        """Decodes ranges table into integer arrays unless already done (e.g. in MODE_INDEX)."""
+        if self._idx_starts is None:
+            with self._lock:
+                if self._idx_starts is None:
+                    self._init_index()
+
+    def _init_index(self):
+        """Attaches integer arrays from shared memory or maps them from index file if it is valid,
+        decodes (and saves) them otherwise.
+
+        """
+        index_file = self._index_file
+
+        if self._index_shm:
+            from .shared import attach_index
+
+            shm, arrays = attach_index(self._index_shm, self._index_key)
+
+            if arrays is None:
+                shm.close()
+                raise GeoLocatorException(
+                    'Shared memory %s holds no index for database %s' % (self._index_shm, self._init_args[0]))
+
+            self._set_index(arrays)
+            # Keep segment open for as long as the arrays. Set after them to be released after them.
+            self._shm = shm
+            return
+
+        if index_file:
+            arrays = load_index(index_file, self._index_key)
+
+            if arrays is not None:
+                self._set_index(arrays)
+                return
+
+        self._build_index()
+
+        if index_file:
+            try:
+                save_index(index_file, self._index_key, self._get_index())
+
+            except OSError:  # Index file is an optimization, lookups work without it.
+                pass
+
+    def _get_index(self) -> List[Union[array, memoryview]]:
+        """Returns integer arrays to be saved by `save_index()` or packed by `pack_index()`."""
+        return [array('I', self._idx_b), self._idx_m, self._idx_seeks, self._idx_starts]
+
+    def _set_index(self, arrays: List[memoryview]):
+        """Sets integer arrays returned by `load_index()` or `unpack_index()`."""
+        b_idx, self._idx_m, self._idx_seeks, self._idx_starts = arrays
+        self._idx_b = tuple(b_idx)
+
+    @staticmethod
+    def _unpack_index(data: bytes) -> array:
+        """Returns an array of integers from big-endian 4 byte words."""
+        result = array('I', data)
+
+        if byteorder == 'little':
+            result.byteswap()
+
+        return result
+
     def _search_idx(self, ipn: bytes, min_: int, max_: int) -> int:
 
         if self._batch_mode:
@@ -175,7 +755,7 @@ class GeoLocator:
 
         return min_
 
-    def _search_db(self, str_: bytes, ipn: bytes, min_: int, max_: int) -> int:
+    def _search_db(self, str_: bytes, ipn: bytes, min_: int, max_: int, shift: int = 0) -> int:
 
         len_block = self._block_len
 
@@ -185,7 +765,7 @@ class GeoLocator:
 
             while (max_ - min_) > 8:
                 offset = (min_ + max_) >> 1
-                start = offset * len_block
+                start = shift + offset * len_block
 
                 if ipn > str_[start:start + 3]:
                     min_ = offset
@@ -193,11 +773,11 @@ class GeoLocator:
                 else:
                     max_ = offset
 
-            start = min_ * len_block
+            start = shift + min_ * len_block
 
             while ipn >= str_[start:start + 3]:
                 min_ += 1
-                start = min_ * len_block
+                start = shift + min_ * len_block
 
                 if min_ >= max_:
                     break
@@ -206,10 +786,72 @@ class GeoLocator:
             min_ += 1
 
         len_id = self._id_len
-        start = min_ * len_block - len_id
+        start = shift + min_ * len_block - len_id
 
         return int(hexlify(str_[start:start + len_id]), 16)
 
+    def _search_index(self, ipn: int, ip1oct: int) -> int:
+
+        min_ = self._idx_b[ip1oct - 1]
+        max_ = self._idx_b[ip1oct]
+        range_ = self._range
+
+        if max_ - min_ > range_:
+            # Mirrors `_search_idx` and clamping in `_get_pos`.
+            m_idx = self._idx_m
+            part_max = max_ // range_ - 1
+            part_hi = min(part_max + 1, len(m_idx))
+            part = bisect_left(m_idx, ipn, min_ // range_, part_hi)
+
+            if part >= part_hi:
+                part = part_max + 1
+
+            part_min = part * range_ if part > 0 else 0
+            part_max = self._db_items if part > self._m_idx_len else (part + 1) * range_
+
+            if part_min > min_:
+                min_ = part_min
+
+            if part_max < max_:
+                max_ = part_max
+
+        if max_ - min_ > 1:
+            # Mirrors `_search_db`: take the last range starting before IP.
+            starts = self._idx_starts
+            pos = bisect_right(starts, ipn, min_, max_) - 1
+
+            if pos > min_ and starts[pos] == ipn and self._is_pivot(pos, min_, max_):
+                # `_search_db` stops at a bisection pivot equal to IP
+                # and takes the range before it.
+                pos -= 1
+
+        else:
+            pos = min_
+
+        seeks = self._idx_seeks
+
+        return seeks[pos] if 0 <= pos < len(seeks) else 0
+
+    @staticmethod
+    def _is_pivot(pos: int, min_: int, max_: int) -> bool:
+        """Tells whether `_search_db` bisection sets the upper bound at `pos`
+        when searching an IP equal to the start of range `pos`.
+
+        """
+        while (max_ - min_) > 8:
+            offset = (min_ + max_) >> 1
+
+            if offset == pos:
+                return True
+
+            if pos > offset:
+                min_ = offset
+
+            else:
+                max_ = offset
+
+        return False
+
     def _get_pos(self, ip: str) -> int:
 
         ip1oct = int(ip.split('.', 1)[0])
@@ -223,6 +865,107 @@ class GeoLocator:
         except OSError:
             return 0
 
+        if self._index_mode:
+            return self._search_index(int.from_bytes(ipn, 'big'), ip1oct)
+
+        return self._search_pos(ipn, ip1oct)
+
+    def _get_pos_int(self, ip: int) -> int:
+
+        ip1oct = ip >> 24
+
+        if ip1oct <= 0 or ip1oct in {10, 127} or ip1oct >= self._b_idx_len:
+            return 0
+
+        if self._index_mode:
+            return self._search_index(ip, ip1oct)
+
+        return self._search_pos(ip.to_bytes(4, 'big'), ip1oct)
+
+    def _get_pos_packed(self, ipn: bytes) -> int:
+
+        ip1oct = ipn[0]
+
+        if ip1oct in {0, 10, 127} or ip1oct >= self._b_idx_len:
+            return 0
+
+        if self._index_mode:
+            return self._search_index(int.from_bytes(ipn, 'big'), ip1oct)
+
+        return self._search_pos(ipn, ip1oct)
+
+    def _parse_ip(self, ip: str) -> Optional[Tuple[bytes, int]]:
+        """Returns (packed IP, first octet) for IPs to be searched, None for others. See `._get_pos()`."""
+        ip1oct = int(ip.split('.', 1)[0])
+
+        if ip1oct in {0, 10, 127} or ip1oct >= self._b_idx_len:
+            return None
+
+        try:
+            return inet_aton(ip), ip1oct
+
+        except OSError:
+            return None
+
+    def _parse_int(self, ip: int) -> Optional[Tuple[bytes, int]]:
+
+        ip1oct = ip >> 24
+
+        if ip1oct <= 0 or ip1oct in {10, 127} or ip1oct >= self._b_idx_len:
+            return None
+
+        return ip.to_bytes(4, 'big'), ip1oct
+
+    def _parse_packed(self, ipn: bytes) -> Optional[Tuple[bytes, int]]:
+
+        ip1oct = ipn[0]
+
+        if ip1oct in {0, 10, 127} or ip1oct >= self._b_idx_len:
+            return None
+
+        return ipn, ip1oct
+
+    def _sweep(self, parse: Callable, ips: List[Any]) -> List[int]:
+        """Returns data offsets for a batch of IPs.
+
+        Every distinct IP is searched once, and IPs are searched in ascending order,
+        so that the ranges table is passed forward, and in MODE_FILE consecutive IPs
+        from the same ranges block share a single read.
+
+        :param parse: Returns (packed IP, first octet) or None for IPs not to be searched.
+        :param ips:
+
+        """
+        seeks = {}
+        parsed = []
+
+        for ip in ips:
+            if ip not in seeks:
+                seeks[ip] = 0
+                ipn = parse(ip)
+
+                if ipn is not None:
+                    parsed.append(ipn + (ip,))
+
+        parsed.sort()
+
+        if self._index_mode:
+            search_index = self._search_index
+
+            for ipn, ip1oct, ip in parsed:
+                seeks[ip] = search_index(int.from_bytes(ipn, 'big'), ip1oct)
+
+        else:
+            search_pos = self._search_pos
+            last_block = [None, b'']
+
+            for ipn, ip1oct, ip in parsed:
+                seeks[ip] = search_pos(ipn, ip1oct, last_block)
+
+        return [seeks[ip] for ip in ips]
+
+    def _search_pos(self, ipn: bytes, ip1oct: int, last_block: Optional[list] = None) -> int:
+
         if self._batch_mode:
             blocks = {
                 'min': self._b_idx_set[ip1oct-1],
@@ -258,15 +1001,92 @@ class GeoLocator:
 
         length = max_ - min_
 
-        if self._memory_mode:
+        if self._memory_mode or self._paged_mode:
             return self._search_db(self._db, ipn, min_, max_)
 
-        self._fh.seek(self._db_begin + min_ * self._block_len)
+        if self._mmap_mode:
+            return self._search_db(self._mm, ipn, min_, max_, self._db_begin)
+
+        if last_block is None:
+            return self._search_db(
+                self._read(self._db_begin + min_ * self._block_len, length * self._block_len), ipn, 0, length - 1)
+
+        # Batch: reuse the block read for the previous IP.
+        if last_block[0] != (min_, max_):
+            last_block[:] = (min_, max_), self._read(self._db_begin + min_ * self._block_len, length * self._block_len)
 
-        return self._search_db(self._fh.read(length * self._block_len), ipn, 0, length - 1)
+        return self._search_db(last_block[1], ipn, 0, length - 1)
 
     def _read_data_chunk(self, data_type: int, start_pos: int, max_read: int) -> TypeGeoDict:
 
+        cache = self._records_cache
+
+        if cache is None or not start_pos:
+            return self._read_record(data_type, start_pos, max_read)
+
+        key = (data_type, start_pos)
+        record = cache.get(key)
+
+        if record is None:
+            record = self._read_record(data_type, start_pos, max_read)
+            cache.put(key, record)
+
+        # Records are shared through cache, so callers get copies.
+        return dict(record)
+
+    def _read_db(self) -> bytes:
+        """Returns raw ranges table."""
+        size = self._db_items * self._block_len
+
+        if self._memory_mode or self._paged_mode:
+            return self._db
+
+        if self._mmap_mode:
+            return self._mm[self._db_begin:self._db_begin + size]
+
+        return self._read(self._db_begin, size)
+
+    def _read(self, offset: int, size: int) -> bytes:
+        """Reads bytes from database file not depending on (and not moving)
+        current file position, so that reads from several threads do not interfere.
+
+        """
+        if pread is None:
+            with self._read_lock:
+                self._fh.seek(offset)
+                return self._fh.read(size)
+
+        return pread(self._fd, size, offset)
+
+    def _read_paged(self, offset: int, size: int) -> bytes:
+        """Reads bytes from database file through pages cache."""
+        page_size = self._page_size
+        first = offset // page_size
+        last = (offset + size - 1) // page_size
+        start = offset - first * page_size
+
+        if first == last:
+            return self._get_page(first)[start:start + size]
+
+        return b''.join(map(self._get_page, range(first, last + 1)))[start:start + size]
+
+    def _get_page(self, number: int) -> bytes:
+
+        cache = self._pages_cache
+        page = cache.get(number)
+
+        if page is None:
+            page_size = self._page_size
+            page = self._read(number * page_size, page_size)
+            cache.put(number, page)
+
+        return page
+
+    def _read_record(self, data_type: int, start_pos: int, max_read: int) -> TypeGeoDict:
+        return self._parsers[data_type].parse(self._read_raw(data_type, start_pos, max_read))
+
+    def _read_raw(self, data_type: int, start_pos: int, max_read: int) -> bytes:
+        """Returns raw record bytes."""
         raw = b''
 
         if start_pos and max_read:
@@ -285,10 +1105,46 @@ class GeoLocator:
                 if data_type == self._TYPE_REGION:
                     boundary_key = 'regions_begin'
 
-                self._fh.seek(self._info[boundary_key]+start_pos)
-                raw = self._fh.read(max_read)
+                start_pos += self._info[boundary_key]
+
+                if self._mmap_mode:
+                    raw = self._mm[start_pos:start_pos+max_read]
 
-        return self._parse_pack(self._pack[data_type], raw)
+                elif self._paged_mode:
+                    raw = self._read_paged(start_pos, max_read)
+
+                else:
+                    raw = self._read(start_pos, max_read)
+
+        return raw
+
+    def _get_country_id(self, seek: int) -> int:
+        """Returns country ID for a data offset reading only the bytes holding it."""
+        countries = self._countries
+        country_id = countries.get(seek)
+
+        if country_id is None:
+
+            if seek < self._country_size:
+                data_type, name, max_read = self._TYPE_COUNTRY, 'id', self._max_country
+
+            else:
+                data_type, name, max_read = self._TYPE_CITY, 'country_id', self._max_city
+
+            parser = self._parsers[data_type]
+            span = parser.get_field_span(name)
+
+            if span is None:
+                country_id = self._read_data_chunk(data_type, seek, max_read)[name]
+
+            else:
+                offset, size = span
+                country_id = parser.parse_field(name, self._read_raw(data_type, seek + offset, size))
+
+            # Distinct offsets are limited by the number of records.
+            countries[seek] = country_id
+
+        return country_id
 
     def _parse_location(self, start_pos: int, detailed: bool = False) -> TypeGeoDict:
 
@@ -299,7 +1155,7 @@ class GeoLocator:
 
         if start_pos < self._country_size:
             country = self._read_data_chunk(self._TYPE_COUNTRY, start_pos, self._max_country)
-            city = self._parse_pack(self._pack[2])
+            city = self._parsers[self._TYPE_CITY].parse(b'')
             country_only = True
             city['lat'] = country['lat']
             city['lon'] = country['lon']
@@ -355,83 +1211,245 @@ class GeoLocator:
 
     @staticmethod
     def _parse_pack(pack: bytes, item: bytes = b'') -> TypeGeoDict:
+        return PackParser(pack).parse(item)
 
-        result = {}
-        start_pos = 0
-        empty = not item
-
-        map_len = {
-            't': 1, 'T': 1,
-            's': 2, 'S': 2, 'n': 2,
-            'm': 3, 'M': 3,
-            'd': 8,
-            'c': lambda: int(chr_(chunk_type[1:])),
-            'b': lambda: item.find(b'\0', start_pos) - start_pos
-        }
-        map_val = {
-            't': lambda: unpack('b', val),
-            'T': lambda: unpack('B', val),
-            's': lambda: unpack('h', val),
-            'S': lambda: unpack('H', val),
-            'm': lambda: unpack('i', val),  # TODO unpack('i', val + (ord(val[2]) >> 7 ? '\xff' : '\0'))
-            'M': lambda: unpack('I', val + b'\0'),
-            'i': lambda: unpack('i', val),
-            'I': lambda: unpack('I', val),
-            'f': lambda: unpack('f', val),
-            'd': lambda: unpack('d', val),
-            'n': lambda: unpack('h', val)[0] / pow(10, int(chr_(chunk_type[1]))),
-            'N': lambda: unpack('i', val)[0] / pow(10, int(chr_(chunk_type[1]))),
-            'c': lambda: val.rstrip(b' '),
-        }
+    def get_db_version(self) -> int:
+        """Returns database version number."""
+        return self._db_ver
 
-        for chunk in pack.split(b'/'):
+    def get_db_date(self) -> datetime:
+        """Returns database creation datetime."""
+        return datetime.fromtimestamp(self._db_ts)
 
-            chunk_type, chunk_name = chunk.split(b':')
-            chunk_name = chunk_name.decode()
-            type_letter = chr_(chunk_type[0])
+    def get_cache_info(self) -> Dict[str, CacheInfo]:
+        """Returns statistics for enabled caches."""
+        info = {}
+
+        if self._records_cache is not None:
+            info['records'] = self._records_cache.info()
+
+        if self._locations_cache is not None:
+            info['locations'] = self._locations_cache.info()
+
+        if self._pages_cache is not None:
+            info['pages'] = self._pages_cache.info()
+
+        return info
+
+    def get_reverse_index(self) -> 'ReverseIndex':
+        """Returns ReverseIndex mapping city, region and country IDs to IP ranges and records.
+        The index is created once and built lazily on first use.
+
+        """
+        reverse_index = self._reverse_index
+
+        if reverse_index is None:
+            from .reverse import ReverseIndex
 
-            if empty:
-                result[chunk_name] = '' if type_letter in {'b', 'c'} else 0
+            with self._lock:
+                reverse_index = self._reverse_index
+
+                if reverse_index is None:
+                    reverse_index = self._reverse_index = ReverseIndex(self)
+
+        return reverse_index
+
+    def load_records(self):
+        """Reads all city, region and country records referenced from ranges table
+        into records cache, so that no record is read or decoded on lookups afterwards.
+
+        Records cache should be unbounded (`records_cache=None`) to hold them all.
+
+        :raises: GeoLocatorException
+
+        """
+        if self._records_cache is None:
+            raise GeoLocatorException('Records cache is disabled')
+
+        if self._index_mode:
+            seeks = set(self._idx_seeks)
+
+        else:
+            db = self._read_db()
+            id_len = self._id_len
+            seeks = {int.from_bytes(db[pos:pos + id_len], 'big') for pos in range(3, len(db), self._block_len)}
+
+        seeks.discard(0)
+
+        for seek in seeks:
+            self._parse_location(seek, detailed=True)
+
+    @staticmethod
+    def _get_ipn_array(ips: Any) -> 'numpy.ndarray':
+        """Returns an array of IPs as integers from a NumPy array
+        or any buffer of packed (4 bytes big-endian) IPv4 addresses.
+
+        """
+        if numpy is None:
+            raise GeoLocatorException('NumPy is required for bulk lookups')
+
+        if isinstance(ips, numpy.ndarray):
+
+            if ips.dtype.kind not in 'iu':
+                raise GeoLocatorException('IPs array must be of integer type')
+
+            if ips.size and (ips.min() < 0 or ips.max() > 0xFFFFFFFF):
+                raise GeoLocatorException('IPs array values must be within 0 - 4294967295')
+
+            return ips.astype(numpy.uint32, copy=False)
+
+        return numpy.frombuffer(ips, dtype='>u4').astype(numpy.uint32)
+
+    def get_offsets(self, ips: Any) -> 'numpy.ndarray':
+        """Returns an array of data offsets for many IPs at once, 0 for IPs not found.
+        Offsets are searched with a single vectorized pass over ranges table.
+
+        Results follow MODE_MEMORY search semantics even for MODE_FILE instances.
+
+        Requires NumPy. Ranges table is decoded on first call unless MODE_INDEX is used.
+
+        :param ips: NumPy array of IPs as integers (e.g. uint32)
+            or any buffer of packed (4 bytes big-endian) IPv4 addresses.
+
+        :raises: GeoLocatorException
+
+        """
+        ipns = self._get_ipn_array(ips)
+
+        self._ensure_index()
+
+        np = numpy
+        range_ = self._range
+        b_idx = np.array(self._idx_b, dtype=np.int64)
+        m_idx = np.frombuffer(self._idx_m, dtype=np.uint32)
+        starts = np.frombuffer(self._idx_starts, dtype=np.uint32)
+        seeks = np.frombuffer(self._idx_seeks, dtype=np.uint32)
+
+        ip1oct = (ipns >> 24).astype(np.int64)
+        valid = (ip1oct != 0) & (ip1oct != 10) & (ip1oct != 127) & (ip1oct < self._b_idx_len)
+        ip1oct[~valid] = 1
+
+        min_ = b_idx[ip1oct - 1]
+        max_ = b_idx[ip1oct]
+
+        # Vectorized `_search_index`. Bisection within [lo, hi) of a sorted array
+        # equals global bisection clipped to the bounds.
+        part_max = max_ // range_ - 1
+        part_hi = np.minimum(part_max + 1, len(m_idx))
+        part = np.maximum(np.searchsorted(m_idx, ipns, 'left'), min_ // range_)
+        part = np.where(part >= part_hi, part_max + 1, part)
+
+        narrow = (max_ - min_) > range_
+        part_min = np.where(part > 0, part * range_, 0)
+        part_max = np.where(part > self._m_idx_len, self._db_items, (part + 1) * range_)
+        min_ = np.where(narrow, np.maximum(min_, part_min), min_)
+        max_ = np.where(narrow, np.minimum(max_, part_max), max_)
+
+        pos = np.minimum(np.maximum(np.searchsorted(starts, ipns, 'right'), min_), max_) - 1
+
+        # IPs equal to range starts may stop at a bisection pivot, see `_search_index`.
+        exact = (pos > min_) & ((max_ - min_) > 1)
+        exact[exact] = starts[pos[exact]] == ipns[exact]
+
+        for idx in np.flatnonzero(exact):
+            if self._is_pivot(int(pos[idx]), int(min_[idx]), int(max_[idx])):
+                pos[idx] -= 1
+
+        pos = np.where((max_ - min_) > 1, pos, min_)
+
+        found = valid & (pos >= 0) & (pos < len(seeks))
+        offsets = np.zeros(len(ipns), dtype=np.uint32)
+        offsets[found] = seeks[pos[found]]
+
+        return offsets
+
+    def get_columns(self, ips: Any) -> Dict[str, 'numpy.ndarray']:
+        """Returns a dictionary of NumPy arrays with location data for many IPs at once:
+            offset, country_id, country_iso, city_id, lat, lon
+
+        Each record is decoded once however many IPs it is shared by.
+
+        Requires NumPy. See `.get_offsets()`.
+
+        :param ips: NumPy array of IPs as integers (e.g. uint32)
+            or any buffer of packed (4 bytes big-endian) IPv4 addresses.
+
+        :raises: GeoLocatorException
+
+        """
+        np = numpy
+        offsets = self.get_offsets(ips)
+        unique, inverse = np.unique(offsets, return_inverse=True)
+
+        country_id = np.zeros(len(unique), dtype=np.uint16)
+        city_id = np.zeros(len(unique), dtype=np.uint32)
+        lat = np.zeros(len(unique), dtype=np.float64)
+        lon = np.zeros(len(unique), dtype=np.float64)
+
+        for idx, seek in enumerate(unique.tolist()):
+
+            if not seek:
                 continue
 
-            length = map_len.get(type_letter, 4)
-            chars = type_letter in {'c', 'b'}
+            location = self._parse_location(seek)
 
-            if chars:
-                length = length()
+            if location:
+                country_id[idx] = location['country_id']
+                city_id[idx] = location['info']['city']['id']
+                lat[idx] = location['lat']
+                lon[idx] = location['lon']
 
-            end_pos = start_pos+length
-            val: bytes = item[start_pos:end_pos]
-            val_real = map_val.get(type_letter)
+        country_id = country_id[inverse]
 
-            if val_real is None:  # case `b`
-                val_real = val
-                length += 1
+        return {
+            'offset': offsets,
+            'country_id': country_id,
+            'country_iso': np.array(self._cc2iso)[country_id],
+            'city_id': city_id[inverse],
+            'lat': lat[inverse],
+            'lon': lon[inverse],
+        }
 
-            else:
-                val_real = val_real()
+    def get_country(self, ip: str) -> str:
+        """Returns country ISO code or an empty string on failure.
 
-            start_pos += length
+        Much cheaper than `.get_location()`: only country ID is read for a location,
+        and then kept for further lookups.
 
-            if chars:
-                val_real = val_real.decode()
+        :param ip:
 
-            result[chunk_name] = val_real
+        """
+        seek = self._get_pos(ip)
 
-            if isinstance(val_real, tuple):
-                result[chunk_name] = val_real[0]
+        if seek > 0 and self._pack:
+            return self._cc2iso[self._get_country_id(seek)]
 
-        return result
+        return ''
 
-    def get_db_version(self) -> int:
-        """Returns database version number."""
-        return self._db_ver
+    def get_countries(self, ip: Union[List[str], str]) -> List[str]:
+        """Returns a list of country ISO codes (empty strings on failure).
+        See `.get_country()`.
 
-    def get_db_date(self) -> datetime:
-        """Returns database creation datetime."""
-        return datetime.fromtimestamp(self._db_ts)
+        :param ip: Argument `ip` must be an iterable object.
+
+        """
+        if isinstance(ip, str):
+            ip = [ip]
+
+        if not self._pack:
+            return ['' for _ in ip]
+
+        cc2iso = self._cc2iso
+        get_country_id = self._get_country_id
+
+        return [cc2iso[get_country_id(pos)] if pos > 0 else '' for pos in map(self._get_pos, ip)]
 
-    def get_location(self, ip: str, detailed: bool = False) -> TypeGeoDict:
+    def get_location(
+        self,
+        ip: str,
+        detailed: bool = False,
+        lean: bool = False
+    ) -> Union[TypeGeoDict, Optional[Location]]:
         """Returns a dictionary with location data or False on failure.
 
         :param ip:
@@ -439,15 +1457,18 @@ class GeoLocator:
         :param detailed: Amount of information about IP contained
             in the dictionary depends upon `detailed` flag state.
 
-        """
-        seek = self._get_pos(ip)
-
-        if seek > 0:
-            return self._parse_location(seek, detailed=detailed)
-
-        return {}
+        :param lean: Return Location object (or None on failure) instead of a dictionary.
+            Records are decoded lazily, so `detailed` is not used.
 
-    def get_locations(self, ip: Union[List[str], str], detailed: bool = False) -> List[TypeGeoDict]:
+        """
+        return self._lookup(self._get_pos, ip, detailed, lean)
+
+    def get_locations(
+        self,
+        ip: Union[List[str], str],
+        detailed: bool = False,
+        lean: bool = False
+    ) -> List[Union[TypeGeoDict, Optional[Location]]]:
         """Returns a list of dictionaries with location data.
 
         :param ip: Argument `ip` must be an iterable object.
@@ -455,11 +1476,247 @@ class GeoLocator:
         :param detailed: Amount of information about IP contained
             in the dictionary depends upon `detailed` flag state.
 
+        :param lean: Return Location objects (None on failure) instead of dictionaries.
+            See `.get_location()`.
+
         """
         if isinstance(ip, str):
             ip = [ip]
-            
-        return [
-            self._parse_location(pos, detailed=detailed) if pos > 0 else {}
-            for pos in map(self._get_pos, ip)
-        ]
+
+        return self._lookups(self._parse_ip, self._get_pos, ip, detailed, lean)
+
+    def iter_locations(
+        self,
+        ips: Iterable[str],
+        detailed: bool = False,
+        lean: bool = False,
+        chunk_size: int = 10000
+    ) -> Iterator[Union[TypeGeoDict, Optional[Location]]]:
+        """Yields location data for IPs from any (possibly unbounded) iterable, in order.
+
+        IPs are consumed lazily by chunks, each chunk is looked up
+        as a batch (see `.get_locations()`), so that at most a chunk
+        of IPs and results is held in memory.
+
+        :param ips:
+
+        :param detailed: Amount of information about IP contained
+            in the dictionary depends upon `detailed` flag state.
+
+        :param lean: Yield Location objects (None on failure) instead of dictionaries.
+
+        :param chunk_size: Number of IPs looked up at a time.
+
+        :raises: ValueError
+
+        """
+        if chunk_size < 1:
+            # Checked right away, not on first iteration.
+            raise ValueError('Chunk size must be at least 1, got %r' % chunk_size)
+
+        if isinstance(ips, str):
+            ips = [ips]
+
+        return self._iter_chunks(iter(ips), detailed, lean, chunk_size)
+
+    def _iter_chunks(
+        self,
+        ips: Iterator[str],
+        detailed: bool,
+        lean: bool,
+        chunk_size: int
+    ) -> Iterator[Union[TypeGeoDict, Optional[Location]]]:
+
+        while True:
+            chunk = list(islice(ips, chunk_size))
+
+            if not chunk:
+                break
+
+            yield from self.get_locations(chunk, detailed=detailed, lean=lean)
+
+    def get_location_int(
+        self,
+        ip: int,
+        detailed: bool = False,
+        lean: bool = False
+    ) -> Union[TypeGeoDict, Optional[Location]]:
+        """Same as `.get_location()` but for IPv4 address as an integer,
+        e.g. 1297889104 for 77.88.55.80. Skips IP string parsing.
+
+        :param ip:
+
+        :param detailed: Amount of information about IP contained
+            in the dictionary depends upon `detailed` flag state.
+
+        :param lean: Return Location object (or None on failure) instead of a dictionary.
+
+        """
+        return self._lookup(self._get_pos_int, ip, detailed, lean)
+
+    def get_locations_int(
+        self,
+        ips: Iterable[int],
+        detailed: bool = False,
+        lean: bool = False
+    ) -> List[Union[TypeGeoDict, Optional[Location]]]:
+        """Same as `.get_locations()` but for IPv4 addresses as integers.
+        See `.get_location_int()`.
+
+        :param ips:
+
+        :param detailed: Amount of information about IP contained
+            in the dictionary depends upon `detailed` flag state.
+
+        :param lean: Return Location objects (None on failure) instead of dictionaries.
+
+        """
+        return self._lookups(self._parse_int, self._get_pos_int, ips, detailed, lean)
+
+    def get_locations_packed(
+        self,
+        ips: bytes,
+        detailed: bool = False,
+        lean: bool = False
+    ) -> List[Union[TypeGeoDict, Optional[Location]]]:
+        """Same as `.get_locations()` but for a buffer of packed
+        (4 bytes big-endian) IPv4 addresses, e.g. `socket.inet_aton()` results.
+        Skips IP string parsing.
+
+        :param ips: bytes-like object.
+
+        :param detailed: Amount of information about IP contained
+            in the dictionary depends upon `detailed` flag state.
+
+        :param lean: Return Location objects (None on failure) instead of dictionaries.
+
+        :raises: GeoLocatorException
+
+        """
+        ips = bytes(ips)
+
+        if len(ips) % 4:
+            raise GeoLocatorException('Packed IPs length must be a multiple of 4')
+
+        return self._lookups(
+            self._parse_packed, self._get_pos_packed, [ips[idx:idx + 4] for idx in range(0, len(ips), 4)],
+            detailed, lean)
+
+    def _lookup(
+        self,
+        get_pos: Callable[[Any], int],
+        ip: Any,
+        detailed: bool,
+        lean: bool
+    ) -> Union[TypeGeoDict, Optional[Location]]:
+
+        cache = self._locations_cache
+
+        if cache is None or lean:
+            return self._get_result(get_pos(ip), detailed, lean)
+
+        if self._locations_cache_by_ip:
+            key = (ip, detailed)
+            location = cache.get(key)
+
+            if location is None:
+                location = self._get_result(get_pos(ip), detailed, False)
+                cache.put(key, location)
+
+        else:
+            seek = get_pos(ip)
+
+            if seek <= 0:
+                return {}
+
+            key = (seek, detailed)
+            location = cache.get(key)
+
+            if location is None:
+                location = self._get_result(seek, detailed, False)
+                cache.put(key, location)
+
+        # Results are shared through cache, so callers get copies.
+        return self._copy_location(location)
+
+    def _lookups(
+        self,
+        parse: Callable,
+        get_pos: Callable[[Any], int],
+        ips: Iterable[Any],
+        detailed: bool,
+        lean: bool
+    ) -> List[Union[TypeGeoDict, Optional[Location]]]:
+
+        if self._locations_cache is None or lean:
+            return self._get_results(self._sweep(parse, list(ips)), detailed, lean)
+
+        lookup = self._lookup
+
+        return [lookup(get_pos, ip, detailed, False) for ip in ips]
+
+    @staticmethod
+    def _copy_location(location: TypeGeoDict) -> TypeGeoDict:
+        """Returns a copy of a location dictionary including nested ones."""
+        if not location:
+            return {}
+
+        location = dict(location)
+        info = location['info'] = dict(location['info'])
+
+        for key, record in info.items():
+            if record is not None:
+                info[key] = dict(record)
+
+        return location
+
+    def _get_result(self, seek: int, detailed: bool, lean: bool) -> Union[TypeGeoDict, Optional[Location]]:
+
+        if lean:
+            return Location(self, seek) if seek > 0 and self._pack else None
+
+        if seek > 0:
+            return self._parse_location(seek, detailed=detailed)
+
+        return {}
+
+    def _get_results(
+        self,
+        seeks: Iterable[int],
+        detailed: bool,
+        lean: bool
+    ) -> List[Union[TypeGeoDict, Optional[Location]]]:
+
+        if lean:
+            if not self._pack:
+                return [None for _ in seeks]
+
+            return [Location(self, pos) if pos > 0 else None for pos in seeks]
+
+        # Every location is decoded once, repeated ones are copied.
+        parse_location = self._parse_location
+        copy_location = self._copy_location
+        decoded = {}
+        results = []
+
+        for pos in seeks:
+
+            if pos <= 0:
+                results.append({})
+                continue
+
+            location = decoded.get(pos)
+
+            if location is None:
+                location = decoded[pos] = parse_location(pos, detailed=detailed)
+
+            else:
+                location = copy_location(location)
+
+            results.append(location)
+
+        return results
+
+
+def _restore_locator(cls, db_file: str, kwargs: dict) -> GeoLocator:
+    return cls(db_file, **kwargs)
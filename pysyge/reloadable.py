@@ -0,0 +1,134 @@
+import os
+from threading import Lock, Thread
+from time import monotonic
+from typing import Any, Optional, Tuple
+from weakref import finalize
+
+from .pysyge import GeoLocator, MODE_FILE
+
+
+def _close(*resources: Any):
+    for resource in resources:
+        if resource is not None:
+            resource.close()
+
+
+class ReloadableGeoLocator:
+    """GeoLocator picking up database file updates without restart.
+
+    Database file is checked for changes (inode, modification time, size)
+    at most once in `check_interval` seconds on lookups. When changed, a new
+    GeoLocator is built in a background thread and then swapped in atomically.
+    Lookups are served by the previous database generation meanwhile.
+    Its file (mapping, shared memory) is closed once it is no longer in use.
+
+    Offers all GeoLocator methods, e.g. `.get_location()`, `.get_db_date()`,
+    which are served by the currently active generation.
+
+    .. note:: Replace database file atomically (e.g. write into a temporary
+        file and rename it), so that a partially written file is not loaded.
+
+    """
+    def __init__(self, db_file: str, mode: int = MODE_FILE, check_interval: Optional[float] = 60, **kwargs):
+        """
+        :param db_file: A path to Sypex Geo IP database file.
+
+        :param mode: GeoLocator mode.
+
+        :param check_interval: Seconds between file change checks. None - do not check,
+            use `.reload()` manually.
+
+        :param kwargs: Other GeoLocator arguments.
+
+        :raises: IOError, GeoLocatorException
+
+        """
+        self.db_file = db_file
+        self.check_interval = check_interval
+        self.generation = 1
+        self.last_error: Optional[Exception] = None
+        """Error from the last failed background reload."""
+
+        self._kwargs = dict(kwargs, mode=mode)
+        self._lock = Lock()
+        self._stamp = self._get_stamp()
+        self._locator = GeoLocator(db_file, **self._kwargs)
+        self._checked = monotonic()
+
+    def __getattr__(self, name: str) -> Any:
+
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        check_interval = self.check_interval
+
+        if check_interval is not None and monotonic() - self._checked >= check_interval:
+            self.check()
+
+        return getattr(self._locator, name)
+
+    def _get_stamp(self) -> Tuple[int, int, int]:
+        stat = os.stat(self.db_file)
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def check(self) -> bool:
+        """Checks whether database file has changed and starts
+        reloading in background if so. Returns True if reloading started.
+
+        """
+        self._checked = monotonic()
+
+        try:
+            changed = self._get_stamp() != self._stamp
+
+        except OSError:  # File is being replaced.
+            return False
+
+        if changed and not self._lock.locked():
+            Thread(target=self._reload_background, daemon=True).start()
+            return True
+
+        return False
+
+    def _reload_background(self):
+        try:
+            self.reload()
+
+        except Exception as e:
+            self.last_error = e
+
+    def reload(self) -> bool:
+        """Loads database file and swaps it in.
+        Returns False if another reload is in progress.
+
+        :raises: IOError, GeoLocatorException
+
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+
+        try:
+            stamp = self._get_stamp()
+            locator = GeoLocator(self.db_file, **self._kwargs)
+            previous = self._locator
+
+            # Swapping a reference is atomic: lookups in progress
+            # are completed by the previous generation.
+            self._locator = locator
+            self._stamp = stamp
+            self.generation += 1
+            self.last_error = None
+
+            # Not closed right away, but once lookups in progress
+            # (and lean results decoding lazily) let it go.
+            finalize(previous, _close, previous._fh, getattr(previous, '_mm', None), previous._shm)
+
+        finally:
+            self._lock.release()
+
+        return True
+
+    @property
+    def locator(self) -> GeoLocator:
+        """GeoLocator of the currently active database generation."""
+        return self._locator
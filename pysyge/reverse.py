@@ -0,0 +1,174 @@
+from collections import defaultdict
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from .export import iter_ranges
+from .pysyge import GeoLocator, Location, TypeGeoDict
+
+TypeIpRange = Tuple[int, int]
+
+
+class ReverseIndex:
+    """Maps locations to IP ranges, and city, region and country IDs to records.
+
+    Built on first use: IP ranges by walking ranges table once,
+    IDs by decoding every location's records once. Then kept.
+
+    Get one with `GeoLocator.get_reverse_index()` to have it built once per database.
+
+    .. code-block:: python
+
+        reverse = geodata.get_reverse_index()
+        reverse.get_city_ranges(524901)  # [(start_ip, end_ip), ...]
+        reverse.get_city(524901)  # {'id': 524901, 'name_en': 'Moscow', ...}
+
+    """
+    def __init__(self, locator: GeoLocator):
+        self._locator = locator
+        self._lock = Lock()
+        self._ranges: Optional[Dict[int, List[TypeIpRange]]] = None
+        self._ids: Optional[Dict[str, Dict[int, List[int]]]] = None
+        self._records: Dict[str, Dict[int, int]] = {}
+
+    def _get_ranges(self) -> Dict[int, List[TypeIpRange]]:
+        ranges = self._ranges
+
+        if ranges is None:
+            with self._lock:
+                ranges = self._ranges
+
+                if ranges is None:
+                    ranges = defaultdict(list)
+
+                    for start, end, seek in iter_ranges(self._locator):
+                        ranges[seek].append((start, end))
+
+                    self._ranges = ranges = dict(ranges)
+
+        return ranges
+
+    def _get_ids(self) -> Dict[str, Dict[int, List[int]]]:
+        ids = self._ids
+
+        if ids is None:
+            ranges = self._get_ranges()
+
+            with self._lock:
+                ids = self._ids
+
+                if ids is None:
+                    ids = {'city': defaultdict(list), 'region': defaultdict(list), 'country': defaultdict(list)}
+                    records = {'city': {}, 'region': {}, 'country': {}}
+
+                    for seek in ranges:
+                        location = Location(self._locator, seek)
+
+                        if location.country_only:
+                            country_seek = seek
+
+                        else:
+                            city_id = location.city_record['id']
+                            ids['city'][city_id].append(seek)
+                            records['city'][city_id] = seek
+
+                            region_seek = location.city_record['region_seek']
+                            country_seek = location.region_record.get('country_seek', 0)
+
+                            if region_seek:
+                                ids['region'][location.region_id].append(seek)
+                                records['region'][location.region_id] = region_seek
+
+                        country_id = location.country_id
+                        ids['country'][country_id].append(seek)
+
+                        if country_seek:
+                            records['country'][country_id] = country_seek
+
+                    self._records = records
+                    self._ids = ids = {kind: dict(seeks) for kind, seeks in ids.items()}
+
+        return ids
+
+    def _get_ranges_for(self, kind: str, record_id: int) -> List[TypeIpRange]:
+        ranges = self._get_ranges()
+        result = []
+
+        for seek in self._get_ids()[kind].get(record_id, ()):
+            result.extend(ranges[seek])
+
+        result.sort()
+
+        return result
+
+    def _get_record(self, kind: str, record_id: int) -> Optional[TypeGeoDict]:
+        self._get_ids()
+        seek = self._records[kind].get(record_id)
+
+        if seek is None:
+            return None
+
+        locator = self._locator
+        data_type, max_read = {
+            'city': (locator._TYPE_CITY, locator._max_city),
+            'region': (locator._TYPE_REGION, locator._max_region),
+            'country': (locator._TYPE_COUNTRY, locator._max_country),
+        }[kind]
+
+        return locator._read_data_chunk(data_type, seek, max_read)
+
+    def get_ranges(self, seek: int) -> List[TypeIpRange]:
+        """Returns a list of (start_ip, end_ip) IP ranges (integers, inclusive)
+        for a location data offset (see `Location.seek`).
+
+        :param seek:
+
+        """
+        return list(self._get_ranges().get(seek, ()))
+
+    def get_city_ranges(self, city_id: int) -> List[TypeIpRange]:
+        """Returns a list of (start_ip, end_ip) IP ranges for a city.
+
+        :param city_id:
+
+        """
+        return self._get_ranges_for('city', city_id)
+
+    def get_region_ranges(self, region_id: int) -> List[TypeIpRange]:
+        """Returns a list of (start_ip, end_ip) IP ranges for all cities of a region.
+
+        :param region_id:
+
+        """
+        return self._get_ranges_for('region', region_id)
+
+    def get_country_ranges(self, country_id: int) -> List[TypeIpRange]:
+        """Returns a list of (start_ip, end_ip) IP ranges for all locations of a country.
+
+        :param country_id:
+
+        """
+        return self._get_ranges_for('country', country_id)
+
+    def get_city(self, city_id: int) -> Optional[TypeGeoDict]:
+        """Returns city record or None if there are no IPs of the city in database.
+
+        :param city_id:
+
+        """
+        return self._get_record('city', city_id)
+
+    def get_region(self, region_id: int) -> Optional[TypeGeoDict]:
+        """Returns region record or None if there are no IPs of the region in database.
+
+        :param region_id:
+
+        """
+        return self._get_record('region', region_id)
+
+    def get_country(self, country_id: int) -> Optional[TypeGeoDict]:
+        """Returns country record or None if there are no IPs of the country in database.
+
+        :param country_id:
+
+        """
+        return self._get_record('country', country_id)
@@ -0,0 +1,147 @@
+import atexit
+import os
+from inspect import signature
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional, Tuple
+
+from .index import pack_index, unpack_index
+from .pysyge import GeoLocator, MODE_FILE, MODE_SHARED
+
+# Python 3.13+ allows opting out of resource tracker on open.
+_TRACK_ARG = 'track' in signature(SharedMemory).parameters
+
+
+class _SharedMemory(SharedMemory):
+
+    def close(self):
+        try:
+            super().close()
+
+        except BufferError:
+            # Index arrays are still in use (e.g. closed on garbage collection
+            # before the locator): the mapping goes away with them.
+            pass
+
+
+def _open_shm(name: Optional[str] = None, size: int = 0) -> SharedMemory:
+    """Opens (creates if size is given) shared memory segment untracked by resource tracker,
+    which would otherwise remove the segment as soon as any process using it exits.
+
+    """
+    create = size > 0
+
+    if _TRACK_ARG:
+        return _SharedMemory(name, create=create, size=size, track=False)
+
+    shm = _SharedMemory(name, create=create, size=size)
+
+    if os.name == 'posix':
+        resource_tracker.unregister(shm._name, 'shared_memory')
+
+    return shm
+
+
+def attach_index(name: str, key: bytes) -> Tuple[SharedMemory, Optional[List[memoryview]]]:
+    """Attaches shared memory segment filled by SharedIndex and returns it
+    along with index arrays. Arrays are None if the segment holds an index of another database.
+
+    :param name: Shared memory segment name.
+
+    :param key: 32 bytes identifying the database the index is built for.
+
+    """
+    shm = _open_shm(name)
+    return shm, unpack_index(shm.buf, key)
+
+
+class SharedIndex:
+    """Integer arrays decoded from database ranges table (see MODE_INDEX)
+    kept in a shared memory segment to be attached by name. Requires Python 3.8+.
+
+    Together with database file mapped into memory (MODE_SHARED) lookups use
+    no per-process copies of the data: neither forked nor spawned processes
+    un-share memory pages by touching Python objects, since there are no objects
+    per range, the arrays are just a few large buffers.
+
+    .. code-block:: python
+
+        with SharedIndex('SxGeoCityMax.dat') as index:
+            # In this or any other process (e.g. workers forked by a server).
+            geodata = GeoLocator('SxGeoCityMax.dat', MODE_SHARED, index_shm=index.name)
+
+    The process that created the index is responsible for its removal
+    with `.unlink()` (done on exit from context manager, or on process exit).
+
+    """
+    def __init__(self, db_file: str, name: Optional[str] = None):
+        """
+        :param db_file: A path to Sypex Geo IP database file.
+
+        :param name: Shared memory segment name. Generated if not given.
+
+        :raises: IOError, GeoLocatorException, FileExistsError
+
+        """
+        locator = GeoLocator(db_file, MODE_FILE)
+
+        try:
+            locator._ensure_index()
+            data = pack_index(locator._index_key, locator._get_index())
+
+        finally:
+            locator.close()
+
+        self.db_file = db_file
+        self._shm = shm = _open_shm(name, len(data))
+        shm.buf[:len(data)] = data
+        self._pid = os.getpid()
+
+        atexit.register(self._cleanup)
+
+    def __enter__(self) -> 'SharedIndex':
+        return self
+
+    def __exit__(self, *args):
+        self.unlink()
+
+    @property
+    def name(self) -> str:
+        """Shared memory segment name to attach the index by."""
+        return self._shm.name
+
+    @property
+    def size(self) -> int:
+        """Shared memory segment size in bytes."""
+        return self._shm.size
+
+    def get_locator(self, mode: int = MODE_SHARED, **kwargs) -> GeoLocator:
+        """Returns GeoLocator using this index.
+
+        :param mode: GeoLocator mode.
+
+        :param kwargs: Other GeoLocator arguments.
+
+        """
+        return GeoLocator(self.db_file, mode, index_shm=self.name, **kwargs)
+
+    def _cleanup(self):
+        # Forked processes inherit exit handlers, but the segment belongs to its creator.
+        if os.getpid() == self._pid:
+            self.unlink()
+
+    def unlink(self):
+        """Removes shared memory segment. Processes already attached to it keep using it."""
+        if self._shm is None:
+            return
+
+        shm, self._shm = self._shm, None
+        atexit.unregister(self._cleanup)
+
+        shm.close()
+
+        if os.name == 'posix' and not _TRACK_ARG:
+            # unlink() unregisters the segment, so it has to be registered not to upset resource tracker.
+            resource_tracker.register(shm._name, 'shared_memory')
+
+        shm.unlink()
@@ -40,6 +40,15 @@ setup(
     include_package_data=True,
     zip_safe=False,
 
+    entry_points={
+        'console_scripts': ['pysyge = pysyge.cli:main'],
+    },
+
+    extras_require={
+        'numpy': ['numpy'],
+        'arrow': ['pyarrow'],
+    },
+
     setup_requires=[] + PYTEST_RUNNER,
     tests_require=['pytest'],
 
@@ -0,0 +1,11 @@
+from os import path
+
+DIR_CURRENT = path.dirname(__file__)
+DATABASE_CITY_FILE = path.join(DIR_CURRENT, 'SxGeoCity.dat')  # 2020.08.17
+BASE_IP = '77.88.55.80'  # Yandex
+
+SAMPLE_IPS = [
+    '%s.%s.%s.%s' % (octet, octet2, octet2 // 3, octet // 2)
+    for octet in range(1, 224, 3)
+    for octet2 in range(0, 256, 17)
+]
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+
+from pysyge import pysyge
+from pysyge.aio import AsyncGeoLocator
+from conftest import DATABASE_CITY_FILE, BASE_IP
+
+
+@pytest.mark.parametrize('mode', [pysyge.MODE_FILE, pysyge.MODE_MEMORY])
+def test_async(mode):
+    ips = [BASE_IP, '100.20.30.40', '127.0.0.1'] * 10
+    expected = pysyge.GeoLocator(DATABASE_CITY_FILE).get_locations(ips, detailed=True)
+
+    async def run():
+        geodata = AsyncGeoLocator(DATABASE_CITY_FILE, mode, max_concurrency=2, chunk_size=4)
+
+        try:
+            assert geodata.get_db_version() >= 21
+
+            locations = await asyncio.gather(*[geodata.get_location(ip, detailed=True) for ip in ips])
+            assert locations == expected
+
+            assert await geodata.get_locations(ips, detailed=True) == expected
+
+        finally:
+            geodata.close()
+
+    asyncio.run(run())
+
+
+def test_async_loops():
+    geodata = AsyncGeoLocator(DATABASE_CITY_FILE, max_concurrency=1)
+    ips = [BASE_IP] * 4
+
+    async def run():
+        # Contending lookups make the semaphore wait on the loop.
+        return await asyncio.gather(*[geodata.get_location(ip) for ip in ips])
+
+    try:
+        # E.g. a loop per test, or application restart.
+        assert asyncio.run(run()) == asyncio.run(run())
+
+    finally:
+        geodata.close()
@@ -0,0 +1,102 @@
+"""Per lookup budgets of database file reads and memory allocations.
+
+These are a contract: a change making lookups read or allocate more
+has to be deliberate, and update both the budgets here and README.
+
+"""
+import tracemalloc
+
+import pytest
+
+from pysyge import pysyge
+from conftest import DATABASE_CITY_FILE, SAMPLE_IPS
+
+
+# Lookup flavours: get_location() arguments.
+KINDS = {
+    'lean': {'lean': True},
+    'plain': {},
+    'detailed': {'detailed': True},
+}
+
+# Most database file reads per lookup: ranges block search, and then every
+# record (city or country, plus region and country if detailed) is read once.
+# MODE_PAGED reads records by pages: a record may span two pages not cached yet.
+READS = {
+    pysyge.MODE_FILE: {'lean': 1, 'plain': 2, 'detailed': 4},
+    pysyge.MODE_BATCH: {'lean': 1, 'plain': 2, 'detailed': 4},
+    pysyge.MODE_INDEX: {'lean': 0, 'plain': 1, 'detailed': 3},
+    pysyge.MODE_PAGED: {'lean': 0, 'plain': 2, 'detailed': 6},
+    pysyge.MODE_MEMORY: {'lean': 0, 'plain': 0, 'detailed': 0},
+    pysyge.MODE_MMAP: {'lean': 0, 'plain': 0, 'detailed': 0},
+    pysyge.MODE_SHARED: {'lean': 0, 'plain': 0, 'detailed': 0},
+}
+
+# Most bytes allocated at once during a lookup, result included. Same for all modes.
+ALLOCATED = {'lean': 1024, 'plain': 2048, 'detailed': 4096}
+
+# Most bytes kept allocated after a lookup, result dropped (nothing is cached by default).
+RETAINED = 16
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    counter = {'reads': 0}
+    pread = pysyge.pread
+
+    def pread_counted(*args):
+        counter['reads'] += 1
+        return pread(*args)
+
+    monkeypatch.setattr(pysyge, 'pread', pread_counted)
+
+    return counter
+
+
+@pytest.mark.skipif(pysyge.pread is None, reason='No os.pread')
+@pytest.mark.parametrize('kind', list(KINDS))
+@pytest.mark.parametrize('mode', list(READS))
+def test_reads(mode, kind, reads):
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, mode)
+    kwargs = KINDS[kind]
+    most = 0
+
+    for ip in SAMPLE_IPS:
+        before = reads['reads']
+        geodata.get_location(ip, **kwargs)
+        most = max(most, reads['reads'] - before)
+
+    assert most <= READS[mode][kind]
+
+
+@pytest.mark.parametrize('kind', list(KINDS))
+@pytest.mark.parametrize('mode', list(READS))
+def test_allocations(mode, kind):
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, mode)
+    kwargs = KINDS[kind]
+
+    # Warm up: lazy structures (e.g. countries, pages) are not accounted.
+    for ip in SAMPLE_IPS:
+        geodata.get_location(ip, **kwargs)
+
+    most = 0
+    tracemalloc.start()
+
+    try:
+        for ip in SAMPLE_IPS:
+            tracemalloc.clear_traces()
+            geodata.get_location(ip, **kwargs)
+            most = max(most, tracemalloc.get_traced_memory()[1])
+
+        tracemalloc.clear_traces()
+
+        for ip in SAMPLE_IPS:
+            geodata.get_location(ip, **kwargs)
+
+        retained = tracemalloc.get_traced_memory()[0]
+
+    finally:
+        tracemalloc.stop()
+
+    assert most <= ALLOCATED[kind]
+    assert retained <= RETAINED * len(SAMPLE_IPS)
@@ -0,0 +1,87 @@
+import json
+import warnings
+from io import StringIO
+
+import pytest
+
+from pysyge.cli import main, read_records, get_value, Writer
+from conftest import DATABASE_CITY_FILE, BASE_IP
+
+
+def test_read_records():
+    assert list(read_records([StringIO('1.1.1.1\n\n 2.2.2.2\n')], 'plain', 'ip')) == [
+        (None, '1.1.1.1'), (None, '2.2.2.2')]
+
+    assert list(read_records([StringIO('{"addr": "1.1.1.1"}\n')], 'jsonl', 'addr')) == [
+        ({'addr': '1.1.1.1'}, '1.1.1.1')]
+
+    assert list(read_records([StringIO('n,ip\n1,1.1.1.1\n')], 'csv', 'ip')) == [
+        ({'n': '1', 'ip': '1.1.1.1'}, '1.1.1.1')]
+
+
+def test_get_value():
+    location = {'city': 'Москва', 'info': {'city': {'name_en': 'Moscow'}}}
+    assert get_value(location, 'city') == 'Москва'
+    assert get_value(location, 'info.city.name_en') == 'Moscow'
+    assert get_value(location, 'info.region.name_en') is None
+    assert get_value({}, 'city') is None
+
+
+def test_writer():
+    out = StringIO()
+    writer = Writer(out, 'csv', ['city'])
+    writer.write(None, '1.1.1.1', ('Москва',))
+    writer.write(None, '2.2.2.2', (None,))
+    assert out.getvalue().splitlines() == ['ip,city', '1.1.1.1,Москва', '2.2.2.2,']
+
+    out = StringIO()
+    writer = Writer(out, 'csv', ['city'])
+    writer.write({'n': 1}, '1.1.1.1', ('Москва',))
+    assert out.getvalue().splitlines() == ['n,city', '1,Москва']
+
+    writer.write({'n': 2, 'extra': 3}, '1.1.1.1', ('Москва',))
+    writer.write({}, '1.1.1.1', ('Москва',))
+    assert out.getvalue().splitlines()[2:] == ['2,Москва', ',Москва']
+
+    out = StringIO()
+    Writer(out, 'jsonl', ['city']).write({'n': 1}, '1.1.1.1', ('Москва',))
+    assert json.loads(out.getvalue()) == {'n': 1, 'city': 'Москва'}
+
+
+@pytest.mark.parametrize('options', [[], ['--processes', '2', '--chunk-size', '1']])
+def test_main(options, tmp_path, capsys):
+    ips = tmp_path / 'ips.txt'
+    ips.write_text('\n'.join([BASE_IP, '127.0.0.1', 'x.1.1.1', BASE_IP]))
+
+    main(['--db', DATABASE_CITY_FILE, '--columns', 'country_iso,info.city.name_en', str(ips)] + options)
+
+    assert [json.loads(line) for line in capsys.readouterr().out.splitlines()] == [
+        {'ip': BASE_IP, 'country_iso': 'RU', 'info.city.name_en': 'Moscow'},
+        {'ip': '127.0.0.1', 'country_iso': None, 'info.city.name_en': None},
+        {'ip': 'x.1.1.1', 'country_iso': None, 'info.city.name_en': None},
+        {'ip': BASE_IP, 'country_iso': 'RU', 'info.city.name_en': 'Moscow'},
+    ]
+
+
+@pytest.mark.parametrize('options', [['--mode', 'file'], ['--mode', 'index', '--processes', '2', '--index-file']])
+def test_main_closes_files(options, tmp_path, capsys):
+    ips = tmp_path / 'ips.txt'
+    ips.write_text(BASE_IP)
+
+    if options[-1] == '--index-file':
+        options = options + [str(tmp_path / 'index.bin')]
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always', ResourceWarning)
+        main(['--db', DATABASE_CITY_FILE, str(ips)] + options)
+
+    assert capsys.readouterr().out
+    assert not [warning for warning in caught if issubclass(warning.category, ResourceWarning)]
+
+
+def test_main_bad_db(tmp_path):
+    ips = tmp_path / 'ips.txt'
+    ips.write_text(BASE_IP)
+
+    with pytest.raises(IOError):
+        main(['--db', 'nosuchfile.dat', '--processes', '2', str(ips)])
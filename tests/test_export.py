@@ -0,0 +1,74 @@
+import csv
+from bisect import bisect_right
+from socket import inet_aton
+
+import pytest
+
+from pysyge import pysyge
+from pysyge.export import COLUMNS, export_ranges, iter_ranges
+from conftest import DATABASE_CITY_FILE, BASE_IP, SAMPLE_IPS
+
+
+@pytest.mark.parametrize('mode', [pysyge.MODE_FILE, pysyge.MODE_BATCH, pysyge.MODE_MEMORY, pysyge.MODE_INDEX])
+def test_ranges(mode):
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, mode)
+    ranges = list(iter_ranges(geodata))
+    starts = [start for start, _, _ in ranges]
+
+    for (start, end, seek), (next_start, _, next_seek) in zip(ranges, ranges[1:]):
+        assert start <= end < next_start
+        assert seek
+
+    for ip in SAMPLE_IPS + [BASE_IP, '10.0.0.1']:
+        ipn = int.from_bytes(inet_aton(ip), 'big')
+        idx = bisect_right(starts, ipn) - 1
+        found = ranges[idx][2] if idx >= 0 and ranges[idx][1] >= ipn else 0
+        assert found == geodata._get_pos(ip), ip
+
+    # Range bounds, where search quirks (different in different modes) show, are looked up the same.
+    for start, end, seek in ranges:
+        assert geodata._get_pos_int(start) == geodata._get_pos_int(end) == seek, (start, end)
+
+
+def test_export_csv(tmp_path):
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE)
+    target = str(tmp_path / 'ranges.csv')
+
+    count = export_ranges(geodata, target, chunk_size=1000)
+
+    with open(target, encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+
+    assert tuple(rows[0]) == COLUMNS
+    assert len(rows) == count + 1
+
+    ipn = int.from_bytes(inet_aton(BASE_IP), 'big')
+    row = [row for row in rows[1:] if int(row[0]) <= ipn <= int(row[1])][0]
+    location = geodata.get_location(BASE_IP, detailed=True)
+    assert row[3] == location['country_iso']
+    assert int(row[4]) == location['region_id']
+    assert row[8] == location['city']
+
+    with pytest.raises(pysyge.GeoLocatorException):
+        export_ranges(geodata, target, fmt='xls')
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_export_columnar(fmt, tmp_path):
+    pyarrow = pytest.importorskip('pyarrow')
+
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_INDEX)
+    target = str(tmp_path / 'ranges')
+
+    count = export_ranges(geodata, target, fmt=fmt, chunk_size=1000)
+
+    if fmt == 'parquet':
+        from pyarrow import parquet
+        table = parquet.read_table(target)
+
+    else:
+        table = pyarrow.ipc.open_file(target).read_all()
+
+    assert table.num_rows == count
+    assert tuple(table.column_names) == COLUMNS
+    assert 'RU' in table.column('country_iso').to_pylist()
@@ -0,0 +1,77 @@
+from socket import inet_aton
+
+import pytest
+
+from pysyge import pysyge
+from pysyge.federation import FederatedGeoLocator
+from conftest import DATABASE_CITY_FILE, BASE_IP
+
+
+def test_federation():
+    city = pysyge.GeoLocator(DATABASE_CITY_FILE)
+    geodata = FederatedGeoLocator([city, DATABASE_CITY_FILE], mode=pysyge.MODE_MEMORY)
+    assert geodata.locators[0] is city
+    assert geodata.locators[1]._memory_mode
+    assert len(geodata.get_db_versions()) == len(geodata.get_db_dates()) == 2
+
+    ips = [BASE_IP, '100.20.30.40', '127.0.0.1', 'bogus', BASE_IP]
+    expected = city.get_locations(ips[:3], detailed=True) + [{}, city.get_location(BASE_IP, detailed=True)]
+
+    locations = geodata.get_locations(ips, detailed=True)
+    assert locations == expected
+    assert locations[0] is not locations[4]
+    assert geodata.get_location(BASE_IP) == city.get_location(BASE_IP)
+
+    # Lower priority database is only swept with IPs not found.
+    swept = []
+    get_locations_int = geodata.locators[1].get_locations_int
+
+    def sweep(ipns, detailed):
+        swept.append(ipns)
+        return get_locations_int(ipns, detailed)
+
+    geodata.locators[1].get_locations_int = sweep
+    geodata.get_locations(ips)
+    assert swept == [[int.from_bytes(inet_aton('127.0.0.1'), 'big')]]
+
+
+def test_federation_close():
+    city = pysyge.GeoLocator(DATABASE_CITY_FILE)
+
+    with FederatedGeoLocator([city, DATABASE_CITY_FILE]) as geodata:
+        opened = geodata.locators[1]
+        assert geodata.get_location(BASE_IP)
+
+    assert opened._fh.closed
+    assert not city._fh.closed
+
+    with pytest.raises(IOError):
+        FederatedGeoLocator([DATABASE_CITY_FILE, 'nosuchfile.dat'])
+
+
+def test_federation_merge(monkeypatch):
+    city = pysyge.GeoLocator(DATABASE_CITY_FILE)
+    country = pysyge.GeoLocator(DATABASE_CITY_FILE)
+
+    # Imitate a country database without location records.
+    monkeypatch.setattr(country, '_pack', '')
+    monkeypatch.setattr(country, '_get_pos_int', lambda ipn: 185)
+    monkeypatch.setattr(country, '_sweep', lambda parse, ipns: [185 for _ in ipns])
+
+    geodata = FederatedGeoLocator([country, city])
+    assert geodata.get_location(BASE_IP) == {'country_id': 185, 'country_iso': 'RU'}
+
+    geodata = FederatedGeoLocator([country, city], merge='fields')
+    location = geodata.get_location(BASE_IP, detailed=True)
+    assert location['country_iso'] == 'RU'
+    assert location['city'] == 'Москва'
+    assert location['info']['city']['name_en'] == 'Moscow'
+
+    ips = [BASE_IP, '100.20.30.40', 'bogus', BASE_IP]
+    assert geodata.get_locations(ips, detailed=True) == [geodata.get_location(ip, detailed=True) for ip in ips]
+
+    with pytest.raises(pysyge.GeoLocatorException):
+        FederatedGeoLocator([city], merge='bogus')
+
+    with pytest.raises(pysyge.GeoLocatorException):
+        FederatedGeoLocator([])
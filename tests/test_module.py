@@ -1,13 +1,17 @@
 import datetime
+import pickle
+from concurrent.futures import ThreadPoolExecutor
 from os import path
+from socket import inet_aton
+from struct import pack
+from sys import byteorder
 
 import pytest
 
 from pysyge import pysyge
-
-DIR_CURRENT = path.dirname(__file__)
-DATABASE_CITY_FILE = path.join(DIR_CURRENT, 'SxGeoCity.dat')  # 2020.08.17
-BASE_IP = '77.88.55.80'  # Yandex
+from pysyge.cache import LRUCache
+from pysyge.metrics import LookupMetrics
+from conftest import DIR_CURRENT, DATABASE_CITY_FILE, BASE_IP, SAMPLE_IPS
 
 
 def test_quirks():
@@ -32,6 +36,27 @@ def test_quirks():
     assert result['info']['city']['name_en'] == 'Moscow'
 
 
+def test_pack_parser():
+    parser = pysyge.PackParser(b'T:id/c2:iso/n2:lat/N5:lon/M:seek/m:shift/b:name_ru/b:name_en')
+
+    assert parser.parse() == {
+        'id': 0, 'iso': '', 'lat': 0, 'lon': 0, 'seek': 0, 'shift': 0, 'name_ru': '', 'name_en': ''}
+
+    item = (
+        pack('=B2shi', 185, b'RU', 5575, 3761556) +
+        (70000).to_bytes(3, byteorder) + (-2).to_bytes(3, byteorder, signed=True) +
+        'Москва'.encode() + b'\0' + b'Moscow\0'
+    )
+    assert parser.parse(item) == {
+        'id': 185, 'iso': 'RU', 'lat': 55.75, 'lon': 37.61556, 'seek': 70000, 'shift': -2,
+        'name_ru': 'Москва', 'name_en': 'Moscow'}
+
+    assert parser.get_field_span('seek') == (9, 3)
+    assert parser.get_field_span('name_en') is None
+    assert parser.parse_field('lat', item, 3) == 55.75
+    assert parser.parse_field('seek', item[9:12]) == 70000
+
+
 class TestGeoLocatorBasicCheck:
 
     def test_file_not_found(self):
@@ -48,6 +73,15 @@ class TestGeoLocatorBasicCheck:
         geodata = pysyge.GeoLocator(DATABASE_CITY_FILE)
         assert geodata.get_db_version() >= 21
 
+    @pytest.mark.parametrize('mode', [pysyge.MODE_FILE, pysyge.MODE_MMAP])
+    def test_close(self, mode):
+        geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, mode)
+        geodata.close()
+        assert geodata._fh.closed
+
+        with pytest.raises((OSError, ValueError)):
+            geodata.get_location(BASE_IP)
+
     def test_db_date(self):
         geodata = pysyge.GeoLocator(DATABASE_CITY_FILE)
         assert isinstance(geodata.get_db_date(), datetime.datetime)
@@ -103,15 +137,370 @@ class TestGeoLocatorFileModeCheck:
         assert locations[1]['country_iso'] == 'US'
 
 
-@pytest.mark.parametrize('mode', [pysyge.MODE_MEMORY, pysyge.MODE_BATCH])
+MODES = [
+    pysyge.MODE_MEMORY, pysyge.MODE_BATCH, pysyge.MODE_MMAP, pysyge.MODE_MMAP | pysyge.MODE_BATCH,
+    pysyge.MODE_INDEX, pysyge.MODE_INDEX | pysyge.MODE_MEMORY, pysyge.MODE_PAGED, pysyge.MODE_SHARED,
+]
+
+
+@pytest.mark.parametrize('mode', MODES)
 def test_location_basic(mode):
     geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, mode)
     location = geodata.get_location(BASE_IP)
     assert_location(location)
 
 
-@pytest.mark.parametrize('mode', [pysyge.MODE_MEMORY, pysyge.MODE_BATCH])
+@pytest.mark.parametrize('mode', MODES)
 def test_location_detailed(mode):
     geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, mode)
     location = geodata.get_location(BASE_IP, detailed=True)
     assert_location(location, detailed=True)
+
+
+@pytest.mark.parametrize('mode', [pysyge.MODE_INDEX, pysyge.MODE_INDEX | pysyge.MODE_MMAP])
+def test_index_mode(mode):
+    memory = pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_MEMORY)
+    index = pysyge.GeoLocator(DATABASE_CITY_FILE, mode)
+    assert index.get_locations(SAMPLE_IPS) == memory.get_locations(SAMPLE_IPS)
+
+
+def test_index_file(tmp_path):
+    index_file = str(tmp_path / 'SxGeoCity.idx')
+    expected = pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_MEMORY).get_locations(SAMPLE_IPS)
+
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_INDEX, index_file=index_file)
+    assert path.exists(index_file)
+    assert geodata.get_locations(SAMPLE_IPS) == expected
+
+    # Mapped from file.
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_INDEX | pysyge.MODE_MEMORY, index_file=index_file)
+    assert isinstance(geodata._idx_starts, memoryview)
+    assert geodata.get_locations(SAMPLE_IPS) == expected
+    assert pickle.loads(pickle.dumps(geodata)).get_locations(SAMPLE_IPS) == expected
+
+    # Built for another database.
+    with open(index_file, 'r+b') as f:
+        f.seek(8)
+        f.write(b'\0' * 4)
+
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_INDEX, index_file=index_file)
+    assert not isinstance(geodata._idx_starts, memoryview)
+    assert geodata.get_locations(SAMPLE_IPS) == expected
+
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_INDEX, index_file=index_file)
+    assert isinstance(geodata._idx_starts, memoryview)
+
+
+@pytest.mark.parametrize('mode', [pysyge.MODE_FILE, pysyge.MODE_BATCH, pysyge.MODE_MMAP, pysyge.MODE_INDEX])
+def test_batch_dedupe(mode):
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, mode)
+    ips = list(reversed(SAMPLE_IPS)) + SAMPLE_IPS[::3] + ['127.0.0.1', BASE_IP, BASE_IP]
+
+    locations = geodata.get_locations(ips, detailed=True)
+    assert locations == [geodata.get_location(ip, detailed=True) for ip in ips]
+
+    # Repeated locations are independent copies.
+    locations[-1]['info']['city'].clear()
+    assert_location(locations[-2], detailed=True)
+
+    with pytest.raises(ValueError):
+        geodata.get_locations([BASE_IP, 'x.1.1.1'])
+
+
+def test_iter_locations():
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE)
+    expected = geodata.get_locations(SAMPLE_IPS, detailed=True)
+
+    def gen():
+        yield from SAMPLE_IPS
+
+    locations = geodata.iter_locations(gen(), detailed=True, chunk_size=7)
+    assert not isinstance(locations, list)
+    assert list(locations) == expected
+
+    assert [location.country_iso for location in geodata.iter_locations([BASE_IP], lean=True)] == ['RU']
+    assert list(geodata.iter_locations(BASE_IP)) == [geodata.get_location(BASE_IP)]
+    assert list(geodata.iter_locations([])) == []
+
+    for chunk_size in (0, -1):
+        with pytest.raises(ValueError):
+            geodata.iter_locations(gen(), chunk_size=chunk_size)
+
+
+@pytest.mark.parametrize('mode', [pysyge.MODE_FILE, pysyge.MODE_BATCH, pysyge.MODE_INDEX])
+def test_int_and_packed(mode):
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, mode)
+    ips = SAMPLE_IPS + ['127.0.0.1', '10.0.0.1']
+    expected = geodata.get_locations(ips, detailed=True)
+
+    assert_location(geodata.get_location_int(1297889104))
+    assert geodata.get_location_int(-1) == {}
+    assert geodata.get_location_int(2 ** 32) == {}
+    assert geodata.get_location_int(1297889104, lean=True).country_iso == 'RU'
+
+    ints = [int.from_bytes(inet_aton(ip), 'big') for ip in ips]
+    assert geodata.get_locations_int(ints, detailed=True) == expected
+
+    packed = b''.join(inet_aton(ip) for ip in ips)
+    assert geodata.get_locations_packed(packed, detailed=True) == expected
+    assert geodata.get_locations_packed(bytearray(packed)) == geodata.get_locations(ips)
+
+    with pytest.raises(pysyge.GeoLocatorException):
+        geodata.get_locations_packed(b'\x01\x02')
+
+
+def test_paged_mode():
+    memory = pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_MEMORY)
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_PAGED, page_size=256, pages_budget=1024)
+
+    assert geodata.get_locations(SAMPLE_IPS, detailed=True) == memory.get_locations(SAMPLE_IPS, detailed=True)
+
+    info = geodata.get_cache_info()['pages']
+    assert info.maxsize == 4
+    assert info.currsize == 4
+    assert info.hits and info.misses and info.evictions
+
+
+def test_bulk():
+    numpy = pytest.importorskip('numpy')
+
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE)
+    memory = pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_MEMORY)
+    ips = SAMPLE_IPS + ['127.0.0.1', '10.0.0.1']
+    packed = b''.join(inet_aton(ip) for ip in ips)
+
+    offsets = geodata.get_offsets(packed)
+    assert offsets.tolist() == [memory._get_pos(ip) for ip in ips]
+    assert geodata.get_offsets(numpy.frombuffer(packed, dtype='>u4')).tolist() == offsets.tolist()
+
+    with pytest.raises(pysyge.GeoLocatorException):
+        geodata.get_offsets(numpy.array([-1, 1]))
+
+    columns = geodata.get_columns(inet_aton(BASE_IP) * 2)
+    assert columns['country_iso'].tolist() == ['RU', 'RU']
+    assert columns['country_id'].tolist() == [185, 185]
+    assert columns['lat'][0] == 55.75222
+    assert columns['lon'][1] == 37.61556
+    assert columns['city_id'][0] == geodata.get_location(BASE_IP)['info']['city']['id']
+
+
+def get_range_starts(count: int = 20000) -> list:
+    """Returns IPs at, right before and right after range starts."""
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_INDEX)
+    starts = geodata._idx_starts[:geodata._idx_b[-1]]
+    step = max(len(starts) // count, 1)
+
+    return [start + delta for start in starts[::step] for delta in (-1, 0, 1)]
+
+
+def get_seeks(locations: list) -> list:
+    return [location.seek if location else 0 for location in locations]
+
+
+@pytest.mark.parametrize('mode', [pysyge.MODE_MMAP, pysyge.MODE_INDEX, pysyge.MODE_PAGED])
+def test_range_starts(mode):
+    # Searches hitting range starts exactly are the ones to disagree.
+    ips = get_range_starts()
+    expected = get_seeks(pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_MEMORY).get_locations_int(ips, lean=True))
+
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, mode)
+    assert get_seeks(geodata.get_locations_int(ips, lean=True)) == expected
+    assert get_seeks([geodata.get_location_int(ip, lean=True) for ip in ips]) == expected
+
+    if pysyge.numpy is not None:
+        assert geodata.get_offsets(pysyge.numpy.array(ips, dtype='uint32')).tolist() == expected
+
+
+@pytest.mark.parametrize('mode', [pysyge.MODE_FILE, pysyge.MODE_MMAP])
+def test_pickle(mode):
+    geodata = pickle.loads(pickle.dumps(pysyge.GeoLocator(DATABASE_CITY_FILE, mode, records_cache=10)))
+    assert geodata._records_cache.maxsize == 10
+    assert_location(geodata.get_location(BASE_IP))
+
+
+@pytest.mark.parametrize('pread', [True, False])
+@pytest.mark.parametrize('mode', [pysyge.MODE_FILE, pysyge.MODE_MMAP, pysyge.MODE_INDEX])
+def test_threads(mode, pread, monkeypatch):
+    if not pread:
+        monkeypatch.setattr(pysyge, 'pread', None)
+
+    ips = SAMPLE_IPS * 4
+    expected = pysyge.GeoLocator(DATABASE_CITY_FILE, mode).get_locations(ips, detailed=True)
+
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, mode, records_cache=100)
+
+    with ThreadPoolExecutor(8) as executor:
+        locations = list(executor.map(lambda ip: geodata.get_location(ip, detailed=True), ips))
+
+    assert locations == expected
+
+    # Index is built lazily (reading database) while holding the lock.
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, mode)
+
+    with ThreadPoolExecutor(8) as executor:
+        reverse = list(executor.map(lambda _: geodata.get_reverse_index().get_ranges(0), range(8)))
+
+    assert reverse == [[]] * 8
+    assert geodata._idx_starts is not None
+
+
+@pytest.mark.parametrize('mode', [pysyge.MODE_FILE, pysyge.MODE_MEMORY])
+def test_lean(mode):
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, mode)
+
+    location = geodata.get_location(BASE_IP, lean=True)
+    assert isinstance(location, pysyge.Location)
+    assert location.country_iso == 'RU'
+    assert location.country_id == 185
+    assert location.city == 'Москва'
+    assert location.lat == 55.75222
+    assert location.lon == 37.61556
+    assert location._region is None  # Not decoded until needed.
+    assert location.region_id == 524894
+    assert location.region == 'Москва'
+    assert location.country_record['name_en'] == 'Russia'
+    assert_location(location.to_dict(detailed=True), detailed=True)
+
+    assert geodata.get_location('127.0.0.1', lean=True) is None
+
+    ips = SAMPLE_IPS + ['127.0.0.1']
+    expected = geodata.get_locations(ips, detailed=True)
+
+    for location, location_dict in zip(geodata.get_locations(ips, lean=True), expected):
+
+        if not location_dict:
+            assert location is None
+            continue
+
+        assert location.country_iso == location_dict['country_iso']
+        assert location.country_id == location_dict['country_id']
+        assert location.city == location_dict['city']
+        assert location.lat == location_dict['lat']
+        assert location.lon == location_dict['lon']
+        assert location.region_id == location_dict['region_id']
+        assert location.country_record == location_dict['info']['country']
+
+
+@pytest.mark.parametrize('mode', [pysyge.MODE_FILE, pysyge.MODE_MEMORY, pysyge.MODE_MMAP])
+def test_countries(mode):
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, mode)
+
+    assert geodata.get_country(BASE_IP) == 'RU'
+    assert geodata.get_country('127.0.0.1') == ''
+
+    ips = SAMPLE_IPS + ['127.0.0.1']
+    expected = [location.get('country_iso', '') for location in geodata.get_locations(ips)]
+    assert geodata.get_countries(ips) == expected
+    assert geodata.get_countries(ips) == expected  # Remembered country IDs.
+
+
+@pytest.mark.parametrize('mode', [pysyge.MODE_FILE, pysyge.MODE_MEMORY])
+def test_metrics(mode):
+    metrics = LookupMetrics()
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, mode, metrics=metrics)
+
+    assert_location(geodata.get_location(BASE_IP, detailed=True), detailed=True)
+    geodata.get_locations(['127.0.0.1', '10.0.0.1', '300.1.1.1', '1.2.3.x'])
+
+    with pytest.raises(ValueError):
+        geodata.get_location('x.1.1.1')
+
+    info = metrics.info()
+    assert info['outcomes'] == {'private': 2, 'invalid': 3, 'miss': 0, 'country': 0, 'city': 1}
+
+    phases = info['phases']
+    assert phases['search']['calls'] == 1  # Only IPs to be searched.
+    assert phases['record']['calls'] == 3  # city, region, country
+    assert phases['decode']['calls'] == 3
+    assert phases['search_db']['calls'] == 1
+    assert phases['search']['seconds'] > 0
+
+    if mode == pysyge.MODE_FILE:
+        assert info['bytes_read'] > 0
+        assert phases['read']['calls'] == 4  # block, city, region, country
+
+    else:
+        assert info['bytes_read'] == 0
+
+    metrics.reset()
+    assert metrics.info()['outcomes']['city'] == 0
+
+    # Batches are measured as run: every distinct IP is searched once.
+    geodata.get_locations([BASE_IP, '127.0.0.1', BASE_IP])
+    info = metrics.info()
+    assert info['outcomes'] == {'private': 1, 'invalid': 0, 'miss': 0, 'country': 0, 'city': 1}
+    assert info['phases']['search']['calls'] == 1
+
+    # Not instrumented without metrics.
+    assert 'GeoLocator' in pysyge.GeoLocator(DATABASE_CITY_FILE)._get_pos.__qualname__
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)  # evicts `b`
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+    assert cache.info() == (2, 1, 1, 2, 2)
+
+    cache.clear()
+    assert cache.info() == (0, 0, 0, 2, 0)
+
+
+@pytest.mark.parametrize('records_cache, stats', [(1, (0, 6, 5)), (3, (3, 3, 0)), (None, (3, 3, 0))])
+def test_records_cache(records_cache, stats):
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, records_cache=records_cache)
+
+    location = geodata.get_location(BASE_IP, detailed=True)
+    assert_location(location, detailed=True)
+    location['info']['city'].clear()  # Cached records are not affected.
+
+    assert_location(geodata.get_location(BASE_IP, detailed=True), detailed=True)
+
+    info = geodata.get_cache_info()['records']
+    assert (info.hits, info.misses, info.evictions) == stats
+
+
+@pytest.mark.parametrize('cache_by, stats', [('range', (4, 1, 0)), ('ip', (3, 3, 0))])
+def test_locations_cache(cache_by, stats):
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, locations_cache=10, locations_cache_by=cache_by)
+
+    location = geodata.get_location(BASE_IP, detailed=True)
+    assert_location(location, detailed=True)
+    location['info']['city'].clear()  # Cached results are not affected.
+
+    assert_location(geodata.get_location(BASE_IP, detailed=True), detailed=True)
+
+    # Another IP of the same range.
+    ips = [BASE_IP, '77.88.55.81', BASE_IP]
+    assert geodata.get_locations(ips, detailed=True)[1]['city'] == 'Москва'
+    assert geodata.get_location('127.0.0.1') == {}
+
+    info = geodata.get_cache_info()['locations']
+    assert (info.hits, info.misses, info.evictions) == stats
+
+    with pytest.raises(pysyge.GeoLocatorException):
+        pysyge.GeoLocator(DATABASE_CITY_FILE, locations_cache_by='city')
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'records_cache': 'bogus'}, {'locations_cache': 1.5}, {'pages_budget': None}, {'pages_budget': '1024'},
+])
+def test_cache_sizes_invalid(kwargs):
+    with pytest.raises(pysyge.GeoLocatorException):
+        pysyge.GeoLocator(DATABASE_CITY_FILE, **kwargs)
+
+
+def test_load_records():
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_MEMORY, records_cache=None)
+    geodata.load_records()
+    loaded = geodata.get_cache_info()['records'].currsize
+    assert loaded > 1000
+
+    assert_location(geodata.get_location(BASE_IP, detailed=True), detailed=True)
+    assert geodata.get_cache_info()['records'].currsize == loaded
+
+    with pytest.raises(pysyge.GeoLocatorException):
+        pysyge.GeoLocator(DATABASE_CITY_FILE).load_records()
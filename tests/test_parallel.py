@@ -0,0 +1,53 @@
+import warnings
+
+import pytest
+
+from pysyge import pysyge
+from pysyge import parallel
+from pysyge.parallel import LocatorPool
+from conftest import DATABASE_CITY_FILE, BASE_IP
+
+
+def test_pool():
+    ips = [BASE_IP, '100.20.30.40', '127.0.0.1'] * 5
+
+    with LocatorPool(DATABASE_CITY_FILE, processes=2, chunk_size=2) as pool:
+        assert pool.get_locations(ips, detailed=True) == pysyge.GeoLocator(DATABASE_CITY_FILE).get_locations(
+            ips, detailed=True)
+
+        # Reusable.
+        assert pool.get_locations(BASE_IP)[0]['country_iso'] == 'RU'
+
+
+def test_pool_errors():
+
+    with pytest.raises(IOError):
+        LocatorPool('nosuchfile.dat')
+
+    with LocatorPool(DATABASE_CITY_FILE, processes=1, records_cache='bogus') as pool:
+        with pytest.raises(pysyge.GeoLocatorException):
+            pool.get_locations([BASE_IP])
+
+
+def test_worker_init_error(monkeypatch):
+    # Worker globals, restored after the test.
+    monkeypatch.setattr(parallel, '_worker_locator', None)
+    monkeypatch.setattr(parallel, '_worker_error', None)
+
+    parallel._init_worker('nosuchfile.dat', {})
+    assert parallel._worker_locator is None
+
+    # Reported with a task instead of failing worker start.
+    with pytest.raises(IOError):
+        parallel._run_in_worker(parallel._get_locations, [BASE_IP])
+
+
+def test_pool_closes_files():
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always', ResourceWarning)
+
+        with LocatorPool(DATABASE_CITY_FILE, processes=1):
+            pass
+
+    assert not [warning for warning in caught if issubclass(warning.category, ResourceWarning)]
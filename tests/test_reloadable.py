@@ -0,0 +1,120 @@
+import gc
+import os
+import shutil
+import warnings
+from time import sleep
+
+import pytest
+
+from pysyge import pysyge
+from pysyge.reloadable import ReloadableGeoLocator
+from conftest import DATABASE_CITY_FILE, BASE_IP
+
+
+def replace_db(target: str, data: bytes):
+    tmp = target + '.tmp'
+
+    with open(tmp, 'wb') as f:
+        f.write(data)
+
+    os.replace(tmp, target)
+
+
+def patch_ts(data: bytes, ts: int) -> bytes:
+    # Timestamp is a big-endian uint32 right after `SxG` and version byte.
+    return data[:4] + ts.to_bytes(4, 'big') + data[8:]
+
+
+def test_reload(tmp_path):
+    db_file = str(tmp_path / 'SxGeoCity.dat')
+    shutil.copy(DATABASE_CITY_FILE, db_file)
+
+    with open(DATABASE_CITY_FILE, 'rb') as f:
+        data = f.read()
+
+    geodata = ReloadableGeoLocator(db_file, pysyge.MODE_MEMORY, check_interval=None)
+    date = geodata.get_db_date()
+    assert geodata.generation == 1
+    assert geodata.get_location(BASE_IP)['country_iso'] == 'RU'
+
+    replace_db(db_file, patch_ts(data, 1000000000))
+    assert geodata.get_db_date() == date  # Not checked automatically.
+
+    assert geodata.reload()
+    assert geodata.generation == 2
+    assert geodata.get_db_date() != date
+    assert geodata.get_location(BASE_IP)['country_iso'] == 'RU'
+    assert isinstance(geodata.locator, pysyge.GeoLocator)
+
+    # Broken file keeps previous generation active.
+    replace_db(db_file, b'broken')
+
+    with pytest.raises(pysyge.GeoLocatorException):
+        geodata.reload()
+
+    assert geodata.generation == 2
+    assert geodata.get_location(BASE_IP)['country_iso'] == 'RU'
+
+    geodata.close()
+
+
+def test_reload_watch(tmp_path):
+    db_file = str(tmp_path / 'SxGeoCity.dat')
+    shutil.copy(DATABASE_CITY_FILE, db_file)
+
+    with open(DATABASE_CITY_FILE, 'rb') as f:
+        data = f.read()
+
+    geodata = ReloadableGeoLocator(db_file, check_interval=0)
+    date = geodata.get_db_date()
+    assert not geodata.check()
+
+    replace_db(db_file, patch_ts(data, 1000000000))
+
+    for _ in range(100):
+        # Lookups are served while reloading in background.
+        assert geodata.get_location(BASE_IP)['country_iso'] == 'RU'
+
+        if geodata.generation == 2:
+            break
+
+        sleep(0.05)
+
+    assert geodata.generation == 2
+    assert geodata.get_db_date() != date
+    assert geodata.last_error is None
+
+    geodata.close()
+
+
+def test_reload_closes_files(tmp_path):
+    db_file = str(tmp_path / 'SxGeoCity.dat')
+    shutil.copy(DATABASE_CITY_FILE, db_file)
+
+    with open(DATABASE_CITY_FILE, 'rb') as f:
+        data = f.read()
+
+    geodata = ReloadableGeoLocator(db_file, check_interval=None)
+    gc.collect()  # Leftovers of other tests.
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always', ResourceWarning)
+
+        for ts in range(1000000000, 1000000003):
+            location = geodata.get_location(BASE_IP, lean=True)
+            fh = geodata.locator._fh
+
+            replace_db(db_file, patch_ts(data, ts))
+            assert geodata.reload()
+
+            # Previous generation is in use for as long as its results.
+            assert not fh.closed
+            assert location.country_iso == 'RU'
+
+            del location
+            gc.collect()
+            assert fh.closed
+
+    assert not [warning for warning in caught if issubclass(warning.category, ResourceWarning)]
+
+    geodata.close()
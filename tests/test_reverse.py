@@ -0,0 +1,55 @@
+from socket import inet_aton, inet_ntoa
+
+from pysyge import pysyge
+from conftest import DATABASE_CITY_FILE, BASE_IP, SAMPLE_IPS
+
+
+def test_reverse_index():
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_MEMORY)
+    reverse = geodata.get_reverse_index()
+    assert reverse is geodata.get_reverse_index()
+
+    location = geodata.get_location(BASE_IP, detailed=True)
+    city_id = location['info']['city']['id']
+    ipn = int.from_bytes(inet_aton(BASE_IP), 'big')
+
+    city_ranges = reverse.get_city_ranges(city_id)
+    assert any(start <= ipn <= end for start, end in city_ranges)
+    assert city_ranges == sorted(city_ranges)
+
+    for start, end in city_ranges:
+        assert geodata.get_location(inet_ntoa(start.to_bytes(4, 'big')))['info']['city']['id'] == city_id
+        assert geodata.get_location(inet_ntoa(end.to_bytes(4, 'big')))['info']['city']['id'] == city_id
+
+    seek = geodata.get_location(BASE_IP, lean=True).seek
+    assert set(reverse.get_ranges(seek)) <= set(city_ranges)
+    assert reverse.get_ranges(0) == []
+
+    assert set(city_ranges) <= set(reverse.get_region_ranges(location['region_id']))
+    assert set(city_ranges) <= set(reverse.get_country_ranges(185))
+
+    assert reverse.get_city(city_id)['name_en'] == 'Moscow'
+    assert reverse.get_region(location['region_id'])['name_ru'] == 'Москва'
+    assert reverse.get_country(185)['iso'] == 'RU'
+    assert reverse.get_city(-1) is None
+
+
+def test_reverse_round_trip():
+    # Default mode search differs from in-memory ones at some range bounds.
+    geodata = pysyge.GeoLocator(DATABASE_CITY_FILE)
+    reverse = geodata.get_reverse_index()
+
+    locations = [location for location in geodata.get_locations(SAMPLE_IPS, lean=True) if location]
+    cities = {location.city_record['id'] for location in locations if not location.country_only}
+    assert cities
+
+    for city_id in cities:
+        for start, end in reverse.get_city_ranges(city_id):
+            assert geodata.get_location_int(start, lean=True).city_record['id'] == city_id
+            assert geodata.get_location_int(end, lean=True).city_record['id'] == city_id
+
+    country_id = geodata.get_location(BASE_IP, lean=True).country_id
+
+    for start, end in reverse.get_country_ranges(country_id):
+        assert geodata.get_location_int(start, lean=True).country_id == country_id
+        assert geodata.get_location_int(end, lean=True).country_id == country_id
@@ -0,0 +1,75 @@
+import os
+import pickle
+
+import pytest
+
+from pysyge import pysyge
+from conftest import DATABASE_CITY_FILE, BASE_IP, SAMPLE_IPS
+
+pytest.importorskip('multiprocessing.shared_memory')
+
+from pysyge.shared import SharedIndex  # noqa: E402  Python 3.8+
+
+
+def test_shared_index():
+    expected = pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_MEMORY).get_locations(SAMPLE_IPS)
+
+    with SharedIndex(DATABASE_CITY_FILE) as index:
+        assert index.size
+
+        geodata = index.get_locator()
+        assert isinstance(geodata._idx_starts, memoryview)
+        assert geodata.get_location(BASE_IP)['country_iso'] == 'RU'
+        assert geodata.get_locations(SAMPLE_IPS) == expected
+
+        # Attached anew on unpickling (e.g. in a spawned process).
+        assert pickle.loads(pickle.dumps(geodata)).get_locations(SAMPLE_IPS) == expected
+
+        pid = os.fork()
+
+        if not pid:
+            geodata = pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_SHARED, index_shm=index.name)
+            os._exit(int(geodata.get_locations(SAMPLE_IPS) != expected))
+
+        assert os.waitpid(pid, 0)[1] == 0
+
+        name = index.name
+
+    # Attached locators keep working after segment removal.
+    assert geodata.get_locations(SAMPLE_IPS) == expected
+
+    # Segment is closed along with database file.
+    shm = geodata._shm
+    geodata.close()
+    assert geodata._shm is None
+    assert shm.buf is None
+
+    geodata.close()
+
+    with pytest.raises(FileNotFoundError):
+        pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_SHARED, index_shm=name)
+
+
+def test_shared_index_mismatch(tmp_path):
+    db_file = str(tmp_path / 'SxGeoCity.dat')
+
+    with open(DATABASE_CITY_FILE, 'rb') as f:
+        data = f.read()
+
+    with open(db_file, 'wb') as f:
+        # Another database timestamp.
+        f.write(data[:4] + (1000000000).to_bytes(4, 'big') + data[8:])
+
+    with SharedIndex(DATABASE_CITY_FILE) as index:
+        with pytest.raises(pysyge.GeoLocatorException):
+            pysyge.GeoLocator(db_file, pysyge.MODE_SHARED, index_shm=index.name)
+
+
+def test_shared_unavailable(monkeypatch):
+    monkeypatch.setattr(pysyge, 'shared_memory', None)
+
+    with pytest.raises(pysyge.GeoLocatorException):
+        pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_SHARED, index_shm='psm_pysyge')
+
+    # Mapped file and index arrays alone work everywhere.
+    assert pysyge.GeoLocator(DATABASE_CITY_FILE, pysyge.MODE_SHARED).get_location(BASE_IP)